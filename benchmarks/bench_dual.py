@@ -0,0 +1,131 @@
+#!/usr/env/bin python3
+"""Micro-benchmark of the DualNumber operators.
+
+Compares the per-operation cost of the current DualNumber (``__slots__`` layout, dual-dual and
+dual-scalar fast paths) against a reference copy of the previous dict-based implementation.
+
+Usage: python benchmarks/bench_dual.py [--number N] [--repeat R]
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from autodiff30.dual import DualNumber
+
+
+class LegacyDualNumber:
+    """The dict-based DualNumber prior to the __slots__ layout, kept as a reference point"""
+
+    def __init__(self, real, dual=1):
+        self.real = real
+        self.dual = dual
+
+    def __add__(self, other):
+        if not isinstance(other, (int, float, LegacyDualNumber)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        if isinstance(other, (int, float)):
+            return LegacyDualNumber(other + self.real, self.dual)
+        else:
+            return LegacyDualNumber(self.real + other.real, self.dual + other.dual)
+
+    def __sub__(self, other):
+        if not isinstance(other, (int, float, LegacyDualNumber)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        if isinstance(other, (int, float)):
+            return LegacyDualNumber(self.real - other, self.dual)
+        else:
+            return LegacyDualNumber(self.real - other.real, self.dual - other.dual)
+
+    def __mul__(self, other):
+        if not isinstance(other, (int, float, LegacyDualNumber)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        if isinstance(other, (int, float)):
+            return LegacyDualNumber(other * self.real, other * self.dual)
+        else:
+            return LegacyDualNumber(
+                self.real * other.real,
+                self.real * other.dual + self.dual * other.real
+            )
+
+    def __truediv__(self, other):
+        if not isinstance(other, (int, float, LegacyDualNumber)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        if isinstance(other, (int, float)):
+            return LegacyDualNumber(self.real / other, self.dual / other)
+        if other.real == 0:
+            raise ZeroDivisionError("Division by zero is impossible")
+        else:
+            return LegacyDualNumber(
+                self.real / other.real,
+                (self.dual * other.real - self.real * other.dual) / (other.real**2)
+            )
+
+    def __pow__(self, other):
+        if not isinstance(other, (int, float, LegacyDualNumber)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        if isinstance(other, (int, float)):
+            if other == 0:
+                return LegacyDualNumber(1, 0)
+            new_real = self.real ** other.real
+            new_dual = other * self.dual * self.real ** (other - 1)
+            return LegacyDualNumber(new_real, new_dual)
+        else:
+            new_real = self.real ** other.real
+            new_dual = other.real * self.dual * self.real ** (other.real - 1) + self.real ** other.real * other.dual * np.log(self.real)
+            return LegacyDualNumber(new_real, new_dual)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __rsub__(self, other):
+        return -self.__sub__(other)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __neg__(self):
+        return LegacyDualNumber(-self.real, -self.dual)
+
+
+OPERATIONS = {
+    "dual + dual": "a + b",
+    "dual + float": "a + 2.5",
+    "float + dual": "2.5 + a",
+    "dual - dual": "a - b",
+    "float - dual": "2.5 - a",
+    "dual * dual": "a * b",
+    "dual * float": "a * 2.5",
+    "float * dual": "2.5 * a",
+    "dual / dual": "a / b",
+    "dual / float": "a / 2.5",
+    "dual ** int": "a ** 3",
+    "dual ** dual": "a ** b",
+}
+
+
+def time_operation(cls, stmt, number, repeat):
+    """Returns the best time per operation, in nanoseconds, of stmt on instances of cls"""
+    namespace = {"a": cls(1.5, 1.0), "b": cls(0.7, 0.0)}
+    return min(timeit.repeat(stmt, globals=namespace, number=number, repeat=repeat)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200_000, help="operations per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best is kept")
+    args = parser.parse_args()
+
+    print(f"{'operation':<14}{'legacy (ns)':>13}{'current (ns)':>14}{'speedup':>10}")
+    for name, stmt in OPERATIONS.items():
+        legacy = time_operation(LegacyDualNumber, stmt, args.number, args.repeat)
+        current = time_operation(DualNumber, stmt, args.number, args.repeat)
+        print(f"{name:<14}{legacy:>13.1f}{current:>14.1f}{legacy / current:>9.2f}x")
+
+    legacy_size = LegacyDualNumber(1.5, 1.0).__dict__.__sizeof__() + object.__sizeof__(LegacyDualNumber(1.5, 1.0))
+    current_size = DualNumber(1.5, 1.0).__sizeof__()
+    print(f"\ninstance size: legacy {legacy_size} bytes (object + __dict__), current {current_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
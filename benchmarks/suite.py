@@ -0,0 +1,354 @@
+#!/usr/env/bin python3
+"""Benchmark suite of the differentiation and optimization hot paths.
+
+Times, in seconds per call:
+  - ops:           each DualNumber operator
+  - elementaries:  each elementary of functions.py on a dual number
+  - grad:          adstruc.grad in forward and reverse mode, for input dimensions 1 to 1000
+  - optimizers:    GD and Adam per iteration, on the Rosenbrock function, a quadratic and a logistic
+                   regression loss
+  - linalg:        the gradient of a least-squares loss written with scalar operations, and with the
+                   primitives of autodiff30.linalg
+  - fused:         the elementaries sharing their transcendentals between value and derivative, and
+                   the joint sincos and sinhcosh, on dual numbers holding 10^6-element arrays, against
+                   the formulas evaluating them twice
+  - precision:     adstruc.grad_batch and adstruc.loss_and_grad on 10^6 rows, in double, single and
+                   mixed precision
+  - compile:       adstruc.grad in forward and reverse mode of a function with Python bookkeeping and a
+                   repeated subexpression, called as is, compiled, and compiled then optimized
+
+The results are written as JSON ({"meta": ..., "results": {name: seconds}}). With --compare, they are
+compared against a saved baseline, and the exit status is 1 if a benchmark got slower than the baseline
+by more than the threshold.
+
+Usage:
+  python benchmarks/suite.py --output baseline.json
+  python benchmarks/suite.py --compare baseline.json [--threshold 1.2]
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import timeit
+
+import numpy as np
+
+import autodiff30.functions as adf
+import autodiff30.optimization as ad_opt
+from autodiff30 import linalg
+from autodiff30.ad import adfunction
+from autodiff30.dual import DualNumber
+
+
+OPERATIONS = {
+    "dual + dual": "a + b",
+    "dual + float": "a + 2.5",
+    "float + dual": "2.5 + a",
+    "dual - dual": "a - b",
+    "float - dual": "2.5 - a",
+    "dual * dual": "a * b",
+    "dual * float": "a * 2.5",
+    "float * dual": "2.5 * a",
+    "dual / dual": "a / b",
+    "dual / float": "a / 2.5",
+    "float / dual": "2.5 / a",
+    "dual ** int": "a ** 3",
+    "dual ** dual": "a ** b",
+    "float ** dual": "2.5 ** a",
+    "-dual": "-a",
+}
+
+# Elementaries with extra arguments, and the point they are evaluated at (inside every domain)
+ELEMENTARIES = {
+    "sin": (adf.sin, ()),
+    "cos": (adf.cos, ()),
+    "tan": (adf.tan, ()),
+    "arcsin": (adf.arcsin, ()),
+    "arccos": (adf.arccos, ()),
+    "arctan": (adf.arctan, ()),
+    "exp": (adf.exp, ()),
+    "log": (adf.log, ()),
+    "log base 2": (adf.log, (2,)),
+    "sqrt": (adf.sqrt, ()),
+    "logistic": (adf.logistic, ()),
+    "sinh": (adf.sinh, ()),
+    "cosh": (adf.cosh, ()),
+    "tanh": (adf.tanh, ()),
+}
+
+DIMENSIONS = (1, 10, 100, 1000)
+
+
+def measure(f, repeat):
+    """Returns the best time per call of f, in seconds, over repeat runs of enough calls to last 0.2s"""
+    timer = timeit.Timer(f)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def bench_ops(repeat):
+    namespace = {"a": DualNumber(0.6, 1.0), "b": DualNumber(0.7, 0.0)}
+    results = {}
+    for name, stmt in OPERATIONS.items():
+        timer = timeit.Timer(stmt, globals=namespace)
+        number, _ = timer.autorange()
+        results[f"ops/{name}"] = min(timer.repeat(repeat=repeat, number=number)) / number
+    return results
+
+
+def bench_elementaries(repeat):
+    x = DualNumber(0.5, 1.0)
+    return {
+        f"elementaries/{name}": measure(lambda f=f, args=args: f(x, *args), repeat)
+        for name, (f, args) in ELEMENTARIES.items()
+    }
+
+
+def _chain(x):
+    """A scalar function of every input, each coupled to the next one"""
+    if len(x) == 1:
+        return x[0] ** 2 + adf.sin(x[0])
+    return sum(x[i] ** 2 + adf.sin(x[i]) * x[i + 1] for i in range(len(x) - 1))
+
+
+def bench_grad(repeat, dimensions=DIMENSIONS):
+    results = {}
+    for mode in ("forward", "reverse"):
+        f = adfunction(_chain, mode=mode)
+        for n in dimensions:
+            x = np.linspace(0.1, 1, n)
+            results[f"grad/{mode} n={n}"] = measure(lambda: f.grad(x), repeat)
+    return results
+
+
+def _rosenbrock(x):
+    return 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
+
+
+def _quadratic(x):
+    return sum((i + 1) * (x[i] - 1) ** 2 for i in range(len(x)))
+
+
+_RNG = np.random.default_rng(0)
+_FEATURES = _RNG.normal(size=(50, 3))
+_LABELS = np.where(_FEATURES @ np.array([1.0, -2.0, 0.5]) > 0, 1.0, -1.0)
+
+
+def _logistic_regression(w):
+    """The logistic loss of a linear classifier on a fixed dataset of 50 points and 3 features"""
+    loss = 0
+    for features, label in zip(_FEATURES.tolist(), _LABELS.tolist()):
+        margin = label * (w[0] * features[0] + w[1] * features[1] + w[2] * features[2])
+        loss = loss + adf.log(1 + adf.exp(-margin))
+    return loss / len(_LABELS)
+
+
+# Functions, initial guesses and learning rates of GD and Adam, small enough for the iterates to stay
+# finite on each
+PROBLEMS = {
+    "rosenbrock": (_rosenbrock, [-1.2, 1.0], {"GD": 1e-3, "Adam": 1e-2}),
+    "quadratic": (_quadratic, [0.0] * 10, {"GD": 1e-2, "Adam": 1e-2}),
+    "logistic regression": (_logistic_regression, [0.0, 0.0, 0.0], {"GD": 1e-1, "Adam": 1e-2}),
+}
+
+
+def time_per_iteration(optimizer, f, initial_guess, lr, iterations):
+    """Returns the wall time per iteration of optimizer on f, running exactly iterations evaluations of f"""
+    calls = 0
+
+    def counted(x):
+        nonlocal calls
+        calls += 1
+        return f(x)
+
+    g = adfunction(counted)
+    start = timeit.default_timer()
+    try:
+        optimizer(g, initial_guess, lr=lr, max_iter=iterations, epsilon=0)
+    except RuntimeWarning:
+        pass
+    return (timeit.default_timer() - start) / calls
+
+
+def bench_optimizers(repeat, iterations=200):
+    results = {}
+    for name, optimizer in (("GD", ad_opt.GD), ("Adam", ad_opt.Adam)):
+        for problem, (f, initial_guess, lr) in PROBLEMS.items():
+            results[f"optimizers/{name} {problem}"] = min(
+                time_per_iteration(optimizer, f, initial_guess, lr[name], iterations) for _ in range(repeat)
+            )
+    return results
+
+
+def _unfused(f, derivative, domain=None):
+    """Returns an elementary evaluating its transcendental separately for its value and derivative,
+    after the same domain check as the elementary of functions.py"""
+
+    def unfused(x):
+        if domain is not None and not domain(x.real):
+            raise ValueError("Outside of the domain")
+        return DualNumber(f(x.real), x.dual * derivative(x.real))
+
+    return unfused
+
+
+# Elementaries on arrays, each with the formulas computing its value and derivative separately
+FUSED = {
+    "exp": (adf.exp, _unfused(np.exp, np.exp)),
+    "sqrt": (adf.sqrt, _unfused(np.sqrt, lambda x: 1 / (2 * np.sqrt(x)), lambda x: np.all(x > 0))),
+    "sincos": (adf.sincos, lambda x: (adf.sin(x), adf.cos(x))),
+    "sinhcosh": (adf.sinhcosh, lambda x: (adf.sinh(x), adf.cosh(x))),
+    "dual ** dual": (lambda x: x**x, lambda x: DualNumber(x.real**x.real, x.real * x.dual * x.real ** (x.real - 1) + x.real**x.real * x.dual * np.log(x.real))),
+}
+
+
+def bench_fused(repeat, size=10**6):
+    x = DualNumber(np.linspace(0.1, 1.2, size), np.ones(size))
+    results = {}
+    for name, (fused, unfused) in FUSED.items():
+        results[f"fused/{name}"] = measure(lambda: fused(x), repeat)
+        results[f"fused/{name} unfused"] = measure(lambda: unfused(x), repeat)
+    return results
+
+
+def _network(x):
+    """A scalar function of 4 inputs, with a few elementaries per input"""
+    hidden = [adf.tanh(x[0] * 0.5 + x[1] - x[2] * x[3]), adf.logistic(x[1] - x[2]), adf.exp(-x[3] * x[3])]
+    return hidden[0] * hidden[1] + adf.sin(hidden[2]) * x[0]
+
+
+def _regression_loss(p, batch):
+    """The squared error of every row of a batch of (feature, feature, label) rows"""
+    return (adf.tanh(p[0] * batch[:, 0] + p[1] * batch[:, 1]) + p[2] - batch[:, 2]) ** 2
+
+
+def bench_precision(repeat, rows=10**6):
+    X = _RNG.uniform(-1, 1, size=(rows, 4))
+    batch = _RNG.uniform(-1, 1, size=(rows, 3))
+    network, loss = adfunction(_network), adfunction(_regression_loss)
+    results = {}
+    for precision in ("double", "single", "mixed"):
+        results[f"precision/grad_batch {precision}"] = measure(lambda: network.grad_batch(X, precision), repeat)
+        results[f"precision/loss_and_grad {precision}"] = measure(
+            lambda: loss.loss_and_grad([0.5, -0.2, 0.1], batch, precision), repeat
+        )
+    return results
+
+
+def bench_linalg(repeat, dimensions=(10, 100)):
+    results = {}
+    for n in dimensions:
+        A = _RNG.normal(size=(2 * n, n))
+        b = _RNG.normal(size=2 * n)
+        x = np.ones(n)
+
+        @adfunction
+        def scalar(x):
+            residuals = [sum(A[i, j] * x[j] for j in range(n)) - b[i] for i in range(2 * n)]
+            return sum(r * r for r in residuals)
+
+        @adfunction
+        def primitives(x):
+            return linalg.norm(linalg.matmul(A, x) - b) ** 2
+
+        results[f"linalg/least squares scalar n={n}"] = measure(lambda: scalar.grad(x), repeat)
+        results[f"linalg/least squares primitives n={n}"] = measure(lambda: primitives.grad(x), repeat)
+    return results
+
+
+def _weighted(x):
+    """A scalar function whose weights are computed in Python, with a logarithm repeated every term"""
+    n = len(x)
+    total = 0
+    for i in range(n - 1):
+        weight = math.exp(-i / n) / (1 + math.sqrt(i))
+        total = total + weight * adf.exp(x[i] * x[i + 1]) - adf.log(x[-1], base=10) / (1 + x[i] ** 2)
+    return total
+
+
+def bench_compile(repeat, dimensions=(10, 100)):
+    results = {}
+    for mode in ("forward", "reverse"):
+        for n in dimensions:
+            x = np.linspace(0.1, 1, n)
+            plain = adfunction(_weighted, mode=mode)
+            compiled = adfunction(_weighted, mode=mode, compile=True)
+            optimized = adfunction(_weighted, mode=mode, compile=True)
+            optimized.optimize(x)
+            results[f"compile/{mode} n={n}"] = measure(lambda: plain.grad(x), repeat)
+            results[f"compile/{mode} compiled n={n}"] = measure(lambda: compiled.grad(x), repeat)
+            results[f"compile/{mode} optimized n={n}"] = measure(lambda: optimized.grad(x), repeat)
+    return results
+
+
+GROUPS = {
+    "ops": bench_ops,
+    "elementaries": bench_elementaries,
+    "grad": bench_grad,
+    "optimizers": bench_optimizers,
+    "linalg": bench_linalg,
+    "fused": bench_fused,
+    "precision": bench_precision,
+    "compile": bench_compile,
+}
+
+
+def run(groups, repeat):
+    """Runs the benchmark groups, returning the JSON-serializable report"""
+    results = {}
+    for group in groups:
+        print(f"running {group}...", file=sys.stderr)
+        results.update(GROUPS[group](repeat))
+    meta = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(results, baseline, threshold):
+    """Prints the ratio of each result to the baseline, returning the names of the regressions"""
+    regressions = []
+    print(f"{'benchmark':<40}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, current in results.items():
+        if name not in baseline:
+            print(f"{name:<40}{'-':>12}{current:>12.3e}{'new':>8}")
+            continue
+        ratio = current / baseline[name]
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"{name:<40}{baseline[name]:>12.3e}{current:>12.3e}{ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=list(GROUPS), default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs, the best is kept")
+    parser.add_argument("--output", help="file to write the JSON results to (default: standard output)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    report = run(args.groups, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(report["results"], baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold}x", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from .ad import adstruc, adfunction
-from .dual import DualNumber
+from .dual import DualNumber, precision
+from .hyperdual import HyperDualNumber
+from .taylor import TaylorNumber
+from .reverse import Node, Tape, checkpoint
 from .functions import (
     cos,
     sin,
@@ -14,13 +17,23 @@ from .functions import (
     sinh,
     cosh,
     tanh,
+    sincos,
+    sinhcosh,
 )
-from .optimization import GD, Adam
+from .optimization import GD, Adam, SGD, StochasticAdam, MiniBatches, LBFGS, OptimizeResult, multistart, MultistartResult
+from .profiling import profile, Profile
+from . import linalg
 
 __all__ = [
     "adstruc",
     "adfunction",
     "DualNumber",
+    "precision",
+    "HyperDualNumber",
+    "TaylorNumber",
+    "Node",
+    "Tape",
+    "checkpoint",
     "cos",
     "sin",
     "tan",
@@ -34,6 +47,18 @@ __all__ = [
     "sinh",
     "cosh",
     "tanh",
+    "sincos",
+    "sinhcosh",
     "GD",
     "Adam",
+    "SGD",
+    "StochasticAdam",
+    "MiniBatches",
+    "LBFGS",
+    "OptimizeResult",
+    "multistart",
+    "MultistartResult",
+    "profile",
+    "Profile",
+    "linalg",
 ]
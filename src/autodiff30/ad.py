@@ -1,8 +1,17 @@
 #!/usr/env/bin python3
 
-from .dual import DualNumber
+from .dual import DualNumber, PRECISIONS, precision as _precision
+from .hyperdual import HyperDualNumber
+from .taylor import TaylorNumber
+from .reverse import Tape, Node
+from .sparse import detect_sparsity, color_columns
+from .trace import Program, OptimizeReport
+from collections import OrderedDict, namedtuple
 import numpy as np
-from typing import Union, List, Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from importlib import import_module
+import time
+from typing import Union, List, Tuple, Callable, Hashable
 
 
 number = Union[int, float]
@@ -10,86 +19,771 @@ OptListDualNumber = Union[DualNumber, List[DualNumber]]
 OptListNumber = Union[number, List[number]]
 
 
-def _select_part(x:OptListDualNumber, part:str) -> OptListNumber:
+def _vector_output(res:OptListDualNumber, x:OptListNumber) -> bool:
+    """Returns whether the output res of f at the input x is a vector held by a single dual number (e.g.
+    computed with linalg.py). This follows from the structure of x: f of scalar inputs has a 1-D real
+    part only when it outputs a vector, while inputs holding arrays (e.g. a batch of points) give
+    outputs holding arrays of the same kind, which are returned as they are.
+
+    :param res: The output of f at x
+    :type res: Union[DualNumber, List[DualNumber]]
+    :param x: A scalar or list (or 1-D array) of scalars
+    :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+    :return: True for a vector output of scalar inputs
+    :rtype: bool
+    """
+    if not isinstance(res, DualNumber) or np.ndim(res.real) != 1:
+        return False
+    if isinstance(x, np.ndarray):
+        return x.ndim <= 1
+    return isinstance(x, (int, float)) or all(np.ndim(elt) == 0 for elt in x)
+
+
+def _select_part(x:OptListDualNumber, part:str, as_array:bool = False, vector:bool = False) -> OptListNumber:
     """Returns either the real or dual parts (according to the param part) of x if x is a dual number,
     or of all elements in x if x is a list of dual numbers.
 
     :param x: A dual number or list of dual numbers
     :type x: Union[DualNumber, List[DualNumber]]
     ...
+    :param as_array: Whether to return the parts of a list as a float64 array, defaults to False
+    :type as_array: bool, optional
+    :param vector: Whether x is a vector output held by a single dual number (see _vector_output), whose
+        parts are returned like those of a list, defaults to False
+    :type vector: bool, optional
     :return: Either the real or dual parts of all dual numbers in input
-    :rtype: Union[float, List[float]]
+    :rtype: Union[float, List[float], np.ndarray]
     """
     assert isinstance(x, (DualNumber, list))
+    if vector:
+        # a vector output held by a single dual number (e.g. computed with linalg.py)
+        parts = x.real if part == "real" else np.broadcast_to(x.dual, x.real.shape)
+        return np.array(parts, dtype=float) if as_array else parts.tolist()
     if isinstance(x, DualNumber):
         return x.real if part == "real" else x.dual
     else:
-        return [y.real for y in x] if part == "real" else [y.dual for y in x]
+        parts = [y.real for y in x] if part == "real" else [y.dual for y in x]
+        return np.array(parts, dtype=float) if as_array else parts
+
+
+def _select_tangents(x:OptListDualNumber, n:int, as_array:bool = False, vector:bool = False) -> Union[List[float], List[List[float]], np.ndarray]:
+    """Returns the tangent vectors of x, or of all elements in x if x is a list of dual numbers,
+    as lists of length n. Dual parts that do not depend on the input (e.g. a constant 0) are
+    broadcast to the full length.
+
+    :param x: A dual number or list of dual numbers carrying vector tangents
+    :type x: Union[DualNumber, List[DualNumber]]
+    :param n: The number of seeded directions
+    :type n: int
+    :param as_array: Whether to return the tangents as a float64 array instead of lists, defaults to False
+    :type as_array: bool, optional
+    :param vector: Whether x is a vector output held by a single dual number (see _vector_output),
+        defaults to False
+    :type vector: bool, optional
+    :return: The gradient of a scalar output, or the rows of the Jacobian of a vector output
+    :rtype: Union[List[float], List[List[float]], np.ndarray]
+    """
+    assert isinstance(x, (DualNumber, list))
+    if vector:
+        # a vector output held by a single dual number, whose tangents are the columns of the Jacobian
+        J = np.broadcast_to(x.dual, (n,) + x.real.shape).T
+        return np.array(J, dtype=float) if as_array else J.tolist()
+    if isinstance(x, DualNumber):
+        tangent = np.broadcast_to(x.dual, (n,))
+        return np.array(tangent, dtype=float) if as_array else tangent.tolist()
+    else:
+        tangents = [np.broadcast_to(y.dual, (n,)) for y in x]
+        return np.array(tangents, dtype=float).reshape(len(x), n) if as_array else [t.tolist() for t in tangents]
+
+
+def _seed(x:OptListNumber, seeds) -> OptListDualNumber:
+    """Creates the dual numbers f is evaluated on to differentiate it: the input x, with the given
+    tangents as dual parts
+
+    :param x: A scalar or list (or array) of scalars
+    :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+    :param seeds: The tangent of x, or the tangent of each element of x
+    :type seeds: Union[Union[int, float], np.ndarray]
+    :return: The seeded dual number, or the list of seeded dual numbers
+    :rtype: Union[DualNumber, List[DualNumber]]
+    """
+    if isinstance(x, (int, float)):
+        return DualNumber(x, seeds)
+    return [DualNumber(elt, seed) for elt, seed in zip(x, seeds)]
+
+
+def _cache_key(x:OptListNumber) -> Hashable:
+    """Returns a hashable key identifying the input x
+
+    :param x: A scalar or list (or 1-D array) of scalars
+    :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+    :return: x itself for a scalar, else the tuple of its elements
+    :rtype: Hashable
+    """
+    if isinstance(x, (int, float)):
+        return x
+    return tuple(x.tolist()) if isinstance(x, np.ndarray) else tuple(x)
+
+
+def _copy_result(x:OptListNumber) -> OptListNumber:
+    """Returns a copy of a value or Jacobian, so cached results cannot be modified through the lists
+    handed to the caller
+
+    :param x: A scalar, list of scalars, list of lists of scalars or array
+    :type x: Union[number, List[number], List[List[number]], np.ndarray]
+    :return: The copy of x
+    :rtype: Union[number, List[number], List[List[number]], np.ndarray]
+    """
+    if isinstance(x, list):
+        return [list(y) if isinstance(y, list) else y for y in x]
+    if isinstance(x, np.ndarray):
+        return x.copy()
+    return x
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _import_function(module:str, qualname:str) -> Callable:
+    """Finds a function pickled by reference, unwrapping it when the name now holds its adstruc
+    (i.e. the function was decorated with adfunction)
+
+    :param module: The name of the module of the function
+    :type module: str
+    :param qualname: The qualified name of the function in its module
+    :type qualname: str
+    :return: The function
+    :rtype: Callable
+    """
+    f = import_module(module)
+    for name in qualname.split("."):
+        f = getattr(f, name)
+    return f.f if isinstance(f, adstruc) else f
+
+
+def _unpickle_adstruc(module:str, qualname:str, mode:str, compile:bool, cache_size:int) -> "adstruc":
+    """Re-creates a pickled adstruc from the reference to its function and its options"""
+    return adstruc(_import_function(module, qualname), mode=mode, compile=compile, cache_size=cache_size)
+
+
+def _grad_columns(f:"adstruc", x:OptListNumber, columns:np.ndarray) -> Tuple[OptListNumber, np.ndarray]:
+    """Computes the value of f at x and the columns of its Jacobian for the given inputs, seeding only
+    those inputs (in a worker of adstruc.grad)
+
+    :param f: The function to differentiate
+    :type f: adstruc
+    :param x: A list (or 1-D array) of scalars
+    :type x: Union[List[Union[int, float]], np.ndarray]
+    :param columns: The indices of the inputs to differentiate with respect to
+    :type columns: np.ndarray
+    :return: The value f(x), and the columns of the Jacobian as an (m, k) array, or (k,) for a scalar output
+    :rtype: Tuple[Union[float, List[float], np.ndarray], np.ndarray]
+    """
+    seeds = np.eye(len(x))[:, columns]
+    res = f._function(x)(_seed(x, seeds))
+    vector = _vector_output(res, x)
+    return _select_part(res, "real", isinstance(x, np.ndarray), vector), _select_tangents(res, len(columns), True, vector)
+
 
 class adstruc:
     """Structure that is returned from the decorator that implements calling and gradient
 
+    Inputs may be scalars, lists or 1-D NumPy arrays. Results for an array input are float64 arrays
+    rather than lists, so array-based code never converts through Python lists.
+
     :param f: A function that can work on dual numbers (or list of dual numbers)
     :type f: Callable[[Union[DualNumber, List[DualNumber]]], Union[DualNumber, List[DualNumber]]]
+    :param mode: "forward" to differentiate with dual numbers, or "reverse" to record the function on a
+        tape and differentiate it with one backward sweep per output, defaults to "forward"
+    :type mode: str, optional
+    :param compile: Whether to trace f once into a flat program of operations that is replayed on later
+        calls instead of f (re-traced when the input shape changes). Only valid for functions whose
+        operations do not depend on the value of their input, defaults to False
+    :type compile: bool, optional
+    :param cache_size: The number of input points whose value and Jacobian are kept in a cache, the least
+        recently used point being evicted first. The Jacobian and the value are stored together, and
+        computing the Jacobian also stores the value. Defaults to 0 (no cache)
+    :type cache_size: int, optional
     """
 
-    def __init__(self, f:Callable[[OptListDualNumber], OptListDualNumber]) -> None:
+    modes = ("forward", "reverse")
+
+    # Minimum cost of an evaluation of f, in seconds, for grad to split it over workers: below it, the
+    # overhead of dispatching the chunks to a pool outweighs the parallel speedup
+    parallel_min_cost = 0.01
+
+    def __init__(self, f:Callable[[OptListDualNumber], OptListDualNumber], mode:str = "forward", compile:bool = False, cache_size:int = 0) -> None:
+        if mode not in self.modes:
+            raise ValueError(f"Unsupported differentiation mode `{mode}`, expected one of {self.modes}")
         self.f = f
+        self.mode = mode
+        self.compile = compile
+        self.programs = {}
+        self.colorings = {}
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.costs = {}
+
+    def __reduce__(self):
+        """Pickles the function with its options, so that it can be sent to worker processes. The cache,
+        compiled programs and sparsity colorings are not pickled: they are rebuilt by the copy on use.
+        The measured costs used by grad are not pickled either. A function decorated with adfunction
+        cannot be pickled by reference as is, since its name holds the adstruc, so it is pickled as the
+        reference to its module and name and unwrapped on loading. Other functions (e.g. lambdas) are
+        pickled as they are.
+
+        :return: The callable re-creating the adstruc and its arguments
+        :rtype: tuple
+        """
+        module, qualname = getattr(self.f, "__module__", None), getattr(self.f, "__qualname__", "<")
+        if module is not None and "<" not in qualname:
+            return _unpickle_adstruc, (module, qualname, self.mode, self.compile, self.cache_size)
+        return adstruc, (self.f, self.mode, self.compile, self.cache_size)
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the statistics of the cache
+
+        :return: The number of hits and misses, the maximum and current number of cached points
+        :rtype: CacheInfo
+        """
+        return CacheInfo(self.cache_hits, self.cache_misses, self.cache_size, len(self.cache))
+
+    def cache_clear(self) -> None:
+        """Empties the cache and resets its statistics"""
+        self.cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cache_get(self, x:OptListNumber, *parts:str) -> List[OptListNumber]:
+        """Looks up results of f at x in the cache
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param parts: The results to look up, by name ("value" and/or "grad")
+        :type parts: str
+        :return: Copies of the cached results, or None if they are not all cached
+        :rtype: List[Union[Union[int, float], List[Union[int, float]]]]
+        """
+        if not self.cache_size:
+            return None
+        key = _cache_key(x)
+        entry = self.cache.get(key)
+        if entry is None or any(part not in entry for part in parts):
+            self.cache_misses += 1
+            return None
+        self.cache.move_to_end(key)
+        self.cache_hits += 1
+        return [_copy_result(entry[part]) for part in parts]
+
+    def _cache_put(self, x:OptListNumber, **parts:OptListNumber) -> None:
+        """Stores results of f at x in the cache, evicting the least recently used points beyond the
+        cache size
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param parts: The results to store, by name ("value" and/or "grad")
+        :type parts: Union[Union[int, float], List[Union[int, float]]]
+        """
+        if not self.cache_size:
+            return
+        key = _cache_key(x)
+        entry = self.cache.setdefault(key, {})
+        entry.update({part: _copy_result(res) for part, res in parts.items()})
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _function(self, x:OptListNumber) -> Callable:
+        """Returns the callable evaluating f at inputs shaped like x: f itself, or its compiled program
+        for that input shape, traced at x on first use
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: f or its compiled program
+        :rtype: Callable
+        """
+        if not self.compile:
+            return self.f
+        key = None if isinstance(x, (int, float)) else len(x)
+        if key not in self.programs:
+            self.programs[key] = Program(self.f, x)
+        return self.programs[key]
+
+    def optimize(self, x:OptListNumber) -> OptimizeReport:
+        """Optimizes the compiled program of f for inputs shaped like x (see Program.optimize), which
+        every later evaluation and derivative at such inputs then replays
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :raises ValueError: If f is not compiled
+        :return: The number of operations of the program before and after the optimization
+        :rtype: OptimizeReport
+        """
+        if not self.compile:
+            raise ValueError("Only compiled functions can be optimized, see the compile argument")
+        return self._function(x).optimize()
 
     def __call__(self, x:OptListNumber) -> OptListNumber:
         """Computes the function f on the input x
 
-        :param x: A scalar or list of scalars
-        :type x: Union[Union[int, float], List[Union[int, float]]]
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
         :return: The value f(x)
         :rtype: Union[Union[int, float], List[Union[int, float]]]
         """
-        assert isinstance(x, (list, int, float))
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        cached = self._cache_get(x, "value")
+        if cached is not None:
+            return cached[0]
 
         if isinstance(x, (int, float)):
-            res = self.f(DualNumber(x, 0))
+            res = self._function(x)(DualNumber(x, 0))
 
         else:
             ds = [DualNumber(elt, 0) for elt in x]
-            res = self.f(ds)
+            res = self._function(x)(ds)
 
-        return _select_part(res, "real")
+        value = _select_part(res, "real", isinstance(x, np.ndarray), _vector_output(res, x))
+        self._cache_put(x, value=value)
+        return value
 
 
-    def grad(self, x:OptListNumber) -> OptListNumber:
+    def grad(self, x:OptListNumber, workers:int = None, executor:Executor = None) -> OptListNumber:
         """Computes the gradient of the function f at the input x
 
-        :param x: A scalar or list of scalars
-        :type x: Union[Union[int, float], List[Union[int, float]]]
+        For expensive functions, the seeded directions can be split into chunks evaluated in parallel: each
+        worker evaluates f once with the tangents of its chunk of inputs, and the chunks of columns are
+        assembled into the Jacobian. The first parallel call for an input length measures the cost of a
+        serial evaluation (and returns its result); later calls stay serial when that cost is below
+        parallel_min_cost, since dispatching the chunks would then cost more than it saves. Parallel
+        evaluation applies to the forward mode and vector inputs, other cases are computed serially.
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param workers: The number of chunks of directions to evaluate in parallel, defaults to None (serial)
+        :type workers: int, optional
+        :param executor: The pool evaluating the chunks, e.g. a ThreadPoolExecutor for functions spending
+            their time in NumPy, defaults to None (a ProcessPoolExecutor with workers processes, created for
+            the call, in which case f must be picklable)
+        :type executor: concurrent.futures.Executor, optional
         :return: The value grad(f)(x)
         :rtype: Union[Union[int, float], List[Union[int, float]]]
         """
-        assert isinstance(x, (list, int, float))
+        if not workers or workers == 1 or self.mode != "forward" or isinstance(x, (int, float)):
+            return self.value_and_grad(x)[1]
+        assert isinstance(x, (list, np.ndarray))
+
+        cached = self._cache_get(x, "grad")
+        if cached is not None:
+            return cached[0]
+
+        n = len(x)
+        if n not in self.costs:
+            start = time.perf_counter()
+            value, J = self._grad_forward(x)
+            self.costs[n] = time.perf_counter() - start
+        elif self.costs[n] < self.parallel_min_cost or n < 2:
+            value, J = self._grad_forward(x)
+        else:
+            chunks = np.array_split(np.arange(n), min(workers, n))
+            if executor is None:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    parts = list(pool.map(_grad_columns, [self] * len(chunks), [x] * len(chunks), chunks))
+            else:
+                parts = list(executor.map(_grad_columns, [self] * len(chunks), [x] * len(chunks), chunks))
+            value = parts[0][0]
+            J = np.concatenate([part[1] for part in parts], axis=-1)
+            if not isinstance(x, np.ndarray):
+                J = J.tolist()
+        self._cache_put(x, value=value, grad=J)
+        return J
+
+    def value_and_grad(self, x:OptListNumber) -> Tuple[OptListNumber, OptListNumber]:
+        """Computes the value and the gradient of the function f at the input x from the same passes:
+        the real parts of the outputs are kept alongside their derivatives
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The values f(x) and grad(f)(x)
+        :rtype: Tuple[Union[Union[int, float], List[Union[int, float]]], Union[Union[int, float], List[Union[int, float]]]]
+        """
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        cached = self._cache_get(x, "value", "grad")
+        if cached is not None:
+            return tuple(cached)
+
+        if self.mode == "reverse":
+            value, J = self._grad_reverse(x)
+        else:
+            value, J = self._grad_forward(x)
+        self._cache_put(x, value=value, grad=J)
+        return value, J
+
+    def _grad_forward(self, x:OptListNumber) -> Tuple[OptListNumber, OptListNumber]:
+        """Computes the value and the gradient of the function f at the input x in forward mode
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The values f(x) and grad(f)(x)
+        :rtype: Tuple[Union[Union[int, float], List[Union[int, float]]], Union[Union[int, float], List[Union[int, float]]]]
+        """
+        if isinstance(x, (int, float)):
+            res = self._function(x)(_seed(x, 1))
+            vector = _vector_output(res, x)
+            return _select_part(res, "real", vector=vector), _select_part(res, "dual", vector=vector)
+
+        else:
+            # Vector mode: input i is seeded with the i-th row of the identity as its tangent,
+            # so a single evaluation of f carries all the directional derivatives at once
+            res = self._function(x)(_seed(x, np.eye(len(x))))
+            as_array, vector = isinstance(x, np.ndarray), _vector_output(res, x)
+            return _select_part(res, "real", as_array, vector), _select_tangents(res, len(x), as_array, vector)
+
+    def grad_batch(self, X:np.ndarray, precision:str = "double", out:np.ndarray = None) -> np.ndarray:
+        """Computes the Jacobian of the function f at many input points with a single evaluation of f.
+        The dual numbers passed to f hold the whole batch as NumPy arrays: the real part of input j is
+        the column X[:, j], and its dual part seeds direction j for every point of the batch.
+
+        :param X: An (N, d) array of N input points of dimension d, or an (N,) array of N scalar inputs
+        :type X: np.ndarray
+        :param precision: The dtypes of the values and tangents, "double", "single" (float32 values
+            and tangents) or "mixed" (float64 values, float32 tangents), see dual.precision for their
+            accuracy, defaults to "double"
+        :type precision: str, optional
+        :param out: The (N, m, d) array to write the Jacobians into, e.g. a slice of a memory-mapped
+            array, defaults to a new array
+        :type out: np.ndarray, optional
+        :return: The (N, m, d) stack of the Jacobians at each point, with m the output dimension of f
+            (m = 1 for a scalar output, d = 1 for a scalar input), of the dtype of the tangents
+        :rtype: np.ndarray
+        """
+        assert precision in PRECISIONS
+        real_dtype, dual_dtype = PRECISIONS[precision]
+        X = np.asarray(X, dtype=real_dtype)
+        assert X.ndim in (1, 2)
+
+        # an empty batch has no point to trace f at, and is evaluated by f itself
+        function = self._function(X[0]) if len(X) else self.f
+        with _precision(precision):
+            if X.ndim == 1:
+                n = 1
+                res = function(DualNumber(X, np.ones((1, 1), dtype=dual_dtype)))
+            else:
+                n = X.shape[1]
+                seeds = np.eye(n, dtype=dual_dtype)[:, :, None]
+                res = function(_seed(X.T, seeds))
+
+        outputs = res if isinstance(res, list) else [res]
+        if out is None:
+            J = np.empty((X.shape[0], len(outputs), n), dtype=dual_dtype)
+        else:
+            assert out.shape == (X.shape[0], len(outputs), n)
+            J = out
+        for i, y in enumerate(outputs):
+            J[:, i, :] = np.broadcast_to(y.dual, (n, X.shape[0])).T
+        return J
+
+    def grad_chunked(self, X, out:np.ndarray = None, chunk_size:int = 65536, precision:str = "double") -> np.ndarray:
+        """Computes the Jacobian of the function f at many input points, too many to be held in memory
+        at once, e.g. rows of a memory-mapped .npy file: X is read in chunks of chunk_size rows, the
+        Jacobians of each chunk are computed with a single evaluation of f by grad_batch, and written
+        straight into out. Only one chunk of inputs and its dual numbers are in memory at a time.
+
+        :param X: An (N, d) or (N,) array of N input points, e.g. a np.memmap, or any object exposing
+            such an array through the buffer protocol, which is read without copying it whole
+        :type X: Union[np.ndarray, np.memmap, memoryview]
+        :param out: The (N, m, d) array to write the Jacobians into, e.g. a np.memmap opened in write
+            mode (which is flushed at the end), defaults to a new array in memory
+        :type out: np.ndarray, optional
+        :param chunk_size: The number of rows per evaluation of f, defaults to 65536
+        :type chunk_size: int, optional
+        :param precision: The dtypes of the values and tangents, see grad_batch, defaults to "double"
+        :type precision: str, optional
+        :return: out, holding the stack of the Jacobians at each point
+        :rtype: np.ndarray
+        """
+        X = np.asarray(X)
+        assert X.ndim in (1, 2)
+        assert chunk_size > 0
+
+        # an empty X still makes one (empty) chunk, whose evaluation gives the output dimension of f
+        for start in range(0, max(X.shape[0], 1), chunk_size):
+            chunk = X[start:start + chunk_size]
+            if out is None:
+                # the output dimension of f is only known after its first evaluation
+                J = self.grad_batch(chunk, precision)
+                out = np.empty((X.shape[0],) + J.shape[1:], dtype=J.dtype)
+                out[:len(J)] = J
+            else:
+                self.grad_batch(chunk, precision, out=out[start:start + chunk_size])
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    def loss_and_grad(self, params:OptListNumber, batch, precision:str = "double") -> Tuple[float, OptListNumber]:
+        """Computes the mean loss over a batch of data and its gradient with respect to the parameters,
+        for a function f(params, batch) with a single evaluation of f. The parameters are dual numbers
+        whose dual parts hold one tangent per parameter, with a trailing axis that broadcasts against
+        the rows of the batch, and the batch is passed to f unchanged: f computes the loss of every row
+        at once with array operations on the batch, e.g. ``(p[0] * batch[:, 0] + p[1] - batch[:, 1])**2``.
+
+        The gradient is always computed in forward mode, from f itself (f is not compiled).
+
+        :param params: A scalar or list (or 1-D array) of scalar parameters
+        :type params: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param batch: The batch of data rows, e.g. a chunk of a memory-mapped array
+        :type batch: np.ndarray
+        :param precision: The dtypes of the values and tangents, "double", "single" (float32 values
+            and tangents, the batch being converted to float32) or "mixed" (float64 values, float32
+            tangents), see dual.precision for their accuracy, defaults to "double"
+        :type precision: str, optional
+        :return: The mean over the batch of the loss f(params, batch), and its gradient with respect to
+            params (a float for a scalar parameter, else a 1-D float64 array, the means being accumulated
+            in float64 whatever the precision)
+        :rtype: Tuple[float, Union[float, np.ndarray]]
+        """
+        assert isinstance(params, (list, np.ndarray, int, float))
+        assert precision in PRECISIONS
+
+        real_dtype, dual_dtype = PRECISIONS[precision]
+        n = 1 if isinstance(params, (int, float)) else len(params)
+        seeds = np.eye(n, dtype=dual_dtype)[:, :, None]
+        if precision != "double":
+            batch = np.asarray(batch, dtype=real_dtype)
+        with _precision(precision):
+            res = self.f(_seed(params, seeds[0] if isinstance(params, (int, float)) else seeds), batch)
+
+        # the loss of every row, and its gradient as an (n, rows) array
+        losses = np.asarray(res.real)
+        grads = np.broadcast_to(res.dual, (n,) + (losses.shape or (1,))).reshape(n, -1)
+        grad = grads.mean(axis=1, dtype=float)
+        return float(losses.mean(dtype=float)), grad.item() if isinstance(params, (int, float)) else grad
+
+    def sparse_jacobian(self, x:OptListNumber):
+        """Computes the Jacobian of the function f at the input x as a scipy.sparse matrix, exploiting
+        its sparsity. The first call for a given input length records f on a tape to find which inputs
+        reach which outputs, and colors the columns so that columns sharing no row share a color. The
+        inputs of one color are then seeded together, so each evaluation of f only carries as many
+        tangents as there are colors (e.g. 3 for a tridiagonal Jacobian, whatever the input length).
+
+        As for compiled functions, the sparsity pattern follows the path taken at the first point, so
+        f should not branch on the value of its input.
+
+        :param x: A list (or 1-D array) of scalars
+        :type x: Union[List[Union[int, float]], np.ndarray]
+        :return: The (m, n) Jacobian of f at x, with m the output dimension of f
+        :rtype: scipy.sparse.csr_matrix
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError as e:
+            raise ImportError("sparse_jacobian requires scipy, install it with `pip install autodiff30[sparse]`") from e
+        assert isinstance(x, (list, np.ndarray))
+
+        n = len(x)
+        if n not in self.colorings:
+            tape, inputs, res = self._record(x)
+            m = len(res) if isinstance(res, list) else 1
+            rows, cols = detect_sparsity(tape, inputs, res)
+            self.colorings[n] = (m, rows, cols, color_columns(rows, cols, n))
+        m, rows, cols, colors = self.colorings[n]
+
+        p = colors.max() + 1 if n else 0
+        seeds = np.zeros((n, p))
+        seeds[np.arange(n), colors] = 1
+        res = self._function(x)(_seed(x, seeds))
+        outputs = res if isinstance(res, list) else [res]
+        # constant outputs have no dual part
+        compressed = np.array([np.broadcast_to(y.dual if isinstance(y, DualNumber) else 0, (p,)) for y in outputs])
+        return csr_matrix((compressed[rows, colors[cols]], (rows, cols)), shape=(m, n))
+
+    def jvp(self, x:OptListNumber, v:OptListNumber) -> OptListNumber:
+        """Computes the Jacobian-vector product J(x)·v, the derivative of f at x in the direction v,
+        with a single forward pass seeding the dual parts of the inputs with v
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param v: The direction, with the same shape as x
+        :type v: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The directional derivative of each output
+        :rtype: Union[Union[int, float], List[Union[int, float]]]
+        """
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        if not isinstance(x, (int, float)):
+            assert len(v) == len(x)
+        res = self._function(x)(_seed(x, v))
+        return _select_part(res, "dual", isinstance(x, np.ndarray), _vector_output(res, x))
+
+    def vjp(self, x:OptListNumber, u:OptListNumber) -> OptListNumber:
+        """Computes the vector-Jacobian product uᵀ·J(x) with a single forward pass recorded on a tape
+        and a single backward sweep seeding the adjoints of the outputs with u
 
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param u: The weight of each output, a scalar for a scalar output
+        :type u: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The weighted sum of the gradients of the outputs
+        :rtype: Union[Union[int, float], List[Union[int, float]]]
+        """
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        tape, inputs, res = self._record(x)
+        if isinstance(res, list):
+            assert len(u) == len(res)
+            adjoints = tape.backward(res, u, inputs)
+        else:
+            adjoints = tape.gradient(res, inputs, seed=u)
         if isinstance(x, (int, float)):
-            d = DualNumber(x, 1)
-            return _select_part(self.f(d), "dual")
+            return adjoints[0]
+        return np.array(adjoints, dtype=float) if isinstance(x, np.ndarray) else adjoints
 
+    def hessian(self, x:OptListNumber) -> Union[number, List[List[float]], List[List[List[float]]]]:
+        """Computes the Hessian of the function f at the input x with a single evaluation of f on
+        hyper-dual numbers: the ε1 parts of the inputs are seeded along the rows and the ε2 parts along
+        the columns of the identity, so the ε1ε2 parts of the outputs hold their full Hessians
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The second derivative for a scalar input, else the Hessian matrix of a scalar output,
+            or the list of the Hessians of each output
+        :rtype: Union[float, List[List[float]], List[List[List[float]]]]
+        """
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        if isinstance(x, (int, float)):
+            res = self._function(x)(HyperDualNumber(x, 1, 1, 0))
+            outputs = res if isinstance(res, list) else [res]
+            H = [y.eps12 for y in outputs]
         else:
-            J = []
-            for i in range(len(x)):
-                ps = [0]*len(x)
-                ps[i] = 1
-                ds = [DualNumber(elt, p) for elt, p in zip(x, ps)]
-                res = self.f(ds)
-                J.append(_select_part(res, "dual"))
-            return np.array(J).T.tolist()
+            n = len(x)
+            seeds = np.eye(n)
+            hs = [HyperDualNumber(elt, seed[:, None], seed[None, :], 0) for elt, seed in zip(x, seeds)]
+            res = self._function(x)(hs)
+            outputs = res if isinstance(res, list) else [res]
+            H = [np.broadcast_to(y.eps12, (n, n)) for y in outputs]
+            if isinstance(x, np.ndarray):
+                H = np.array(H, dtype=float).reshape(len(outputs), n, n)
+            else:
+                H = [h.tolist() for h in H]
+        return H if isinstance(res, list) else H[0]
+
+    def hvp(self, x:OptListNumber, v:OptListNumber) -> OptListNumber:
+        """Computes the Hessian-vector product H(x)·v of a scalar function f without building the
+        Hessian: the ε1 parts of the inputs are seeded with v and the ε2 parts with the rows of the
+        identity, so each operation only propagates vectors of the size of x
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :param v: The vector, with the same shape as x
+        :type v: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The product of the Hessian of f at x with v
+        :rtype: Union[Union[int, float], List[Union[int, float]]]
+        """
+        assert isinstance(x, (list, np.ndarray, int, float))
+
+        if isinstance(x, (int, float)):
+            res = self._function(x)(HyperDualNumber(x, v, 1, 0))
+            return res.eps12
+        else:
+            n = len(x)
+            assert len(v) == n
+            seeds = np.eye(n)
+            hs = [HyperDualNumber(elt, d, seed, 0) for elt, d, seed in zip(x, v, seeds)]
+            res = self._function(x)(hs)
+            Hv = np.broadcast_to(res.eps12, (n,))
+            return np.array(Hv, dtype=float) if isinstance(x, np.ndarray) else Hv.tolist()
+
+    def derivatives(self, x:number, order:int=2) -> Union[List[float], List[List[float]]]:
+        """Computes the derivatives of every order up to order of a function of a scalar at x with a
+        single evaluation of f on a truncated Taylor polynomial x + t of order+1 coefficients, whose
+        operations cost O(order²) instead of the 2^order of nested dual numbers
+
+        :param x: A scalar
+        :type x: Union[int, float]
+        :param order: The highest order of derivative, defaults to 2
+        :type order: int, optional
+        :return: The value and derivatives f(x), f'(x), ..., of order 0 to order, or their list for
+            each output
+        :rtype: Union[List[float], List[List[float]]]
+        """
+        assert isinstance(x, (int, float))
+        assert order >= 0
+
+        seed = np.zeros(order + 1)
+        seed[0] = x
+        if order > 0:
+            seed[1] = 1
+        res = self._function(x)(TaylorNumber(seed))
+        outputs = res if isinstance(res, list) else [res]
+        D = [
+            y.derivatives().tolist() if isinstance(y, TaylorNumber) else [float(y)] + [0.0] * order
+            for y in outputs
+        ]
+        return D if isinstance(res, list) else D[0]
+
+    def _record(self, x:OptListNumber) -> Tuple[Tape, List[Node], Union[Node, List[Node]]]:
+        """Records the evaluation of f at x on a tape
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The tape, the input nodes and the output of f
+        :rtype: Tuple[Tape, List[Node], Union[Node, List[Node]]]
+        """
+        tape = Tape()
+        if isinstance(x, (int, float)):
+            inputs = [tape.variable(x)]
+            res = self._function(x)(inputs[0])
+        else:
+            inputs = [tape.variable(elt) for elt in x]
+            res = self._function(x)(inputs)
+        return tape, inputs, res
+
+    def _grad_reverse(self, x:OptListNumber) -> Tuple[OptListNumber, OptListNumber]:
+        """Computes the value and the gradient of the function f at the input x in reverse mode: f is
+        recorded on a tape during a single forward pass, then each output is differentiated with
+        respect to all the inputs by one backward sweep
+
+        :param x: A scalar or list (or 1-D array) of scalars
+        :type x: Union[Union[int, float], List[Union[int, float]], np.ndarray]
+        :return: The values f(x) and grad(f)(x)
+        :rtype: Tuple[Union[Union[int, float], List[Union[int, float]]], Union[Union[int, float], List[Union[int, float]]]]
+        """
+        tape, inputs, res = self._record(x)
+        outputs = res if isinstance(res, list) else [res]
+        values = [y.value if isinstance(y, Node) else y for y in outputs]
+        J = [tape.gradient(y, inputs) for y in outputs]
+        if isinstance(x, (int, float)):
+            J = [row[0] for row in J]
+        elif isinstance(x, np.ndarray):
+            values, J = np.array(values, dtype=float), np.array(J, dtype=float).reshape(len(outputs), len(x))
+        if isinstance(res, list):
+            return values, J
+        return values[0], J[0]
 
 
 
-def adfunction(f:Callable) -> adstruc:
-    """Functor for function decoration for calling and gradient
+def adfunction(f:Callable = None, mode:str = "forward", compile:bool = False, cache_size:int = 0) -> Union[adstruc, Callable[[Callable], adstruc]]:
+    """Functor for function decoration for calling and gradient. Can be used bare (``@adfunction``)
+    or with options (``@adfunction(mode="reverse")``)
 
     :param f: A function that can work on dual numbers (or list of dual numbers)
     :type f: Callable[[Union[DualNumber, List[DualNumber]]], Union[DualNumber, List[DualNumber]]]
+    :param mode: The differentiation mode, "forward" or "reverse", defaults to "forward"
+    :type mode: str, optional
+    :param compile: Whether to trace f into a flat program replayed on later calls, defaults to False
+    :type compile: bool, optional
+    :param cache_size: The number of input points whose value and Jacobian are cached, defaults to 0
+    :type cache_size: int, optional
     """
+    if f is None:
+        return lambda g: adstruc(g, mode=mode, compile=compile, cache_size=cache_size)
 
-    return adstruc(f)
+    return adstruc(f, mode=mode, compile=compile, cache_size=cache_size)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,324 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
 import numpy as np
 
+
+def _any(condition):
+    """Returns whether a condition holds, for a scalar or anywhere in an array of conditions.
+    Scalars skip the conversion to an array that np.any would make.
+
+    :param condition: The outcome of a comparison
+    :type condition: Union[bool, np.ndarray]
+    :return: True if the condition holds for at least one element
+    :rtype: bool
+    """
+    return condition.any() if isinstance(condition, np.ndarray) else bool(condition)
+
+
+def _all(condition):
+    """Returns whether a condition holds, for a scalar or everywhere in an array of conditions.
+    Scalars skip the conversion to an array that np.all would make.
+
+    :param condition: The outcome of a comparison
+    :type condition: Union[bool, np.ndarray]
+    :return: True if the condition holds for every element
+    :rtype: bool
+    """
+    return condition.all() if isinstance(condition, np.ndarray) else bool(condition)
+
+
+# Elementary functions computing NumPy ufuncs on dual numbers, filled in by functions.py
+_ELEMENTARY_UFUNCS = {}
+
+# Operators computing NumPy ufuncs on dual numbers: the method used when the dual number is the first
+# operand, and when it is the second one
+_OPERATOR_UFUNCS = {
+    np.add: ("__add__", "__radd__"),
+    np.subtract: ("__sub__", "__rsub__"),
+    np.multiply: ("__mul__", "__rmul__"),
+    np.true_divide: ("__truediv__", "__rtruediv__"),
+    np.power: ("__pow__", "__rpow__"),
+    np.matmul: ("__matmul__", "__rmatmul__"),
+}
+
+
+def _tangent(x):
+    """Returns the dual part of x broadcast to its full shape: the shape of the directions (if any)
+    followed by the shape of the real part
+
+    :param x: A dual number
+    :type x: DualNumber
+    :return: The dual part, of shape directions + shape of the real part
+    :rtype: np.ndarray
+    """
+    real_shape, dual_shape = np.shape(x.real), np.shape(x.dual)
+    directions = dual_shape[: max(0, len(dual_shape) - len(real_shape))]
+    return np.broadcast_to(x.dual, directions + real_shape)
+
+
+def _axes(x, axis):
+    """Returns the axes of the dual part of x matching axis of its real part (None for all of them)"""
+    ndim = np.ndim(x.real)
+    axes = range(ndim) if axis is None else np.atleast_1d(axis)
+    offset = np.ndim(_tangent(x)) - ndim
+    return tuple(offset + int(a) % ndim for a in axes)
+
+
+def _sum(x, axis=None):
+    """Implements np.sum for dual numbers"""
+    return DualNumber(np.sum(x.real, axis=axis), np.sum(_tangent(x), axis=_axes(x, axis)))
+
+
+def _mean(x, axis=None):
+    """Implements np.mean for dual numbers"""
+    return DualNumber(np.mean(x.real, axis=axis), np.mean(_tangent(x), axis=_axes(x, axis)))
+
+
+# NumPy functions implemented for dual numbers, by __array_function__ (linalg.py adds the linear
+# algebra functions)
+_ARRAY_FUNCTIONS = {
+    np.sum: _sum,
+    np.mean: _mean,
+}
+
+
+# The dtypes of the real and dual parts of the dual numbers holding arrays, for each precision. Single
+# precision stores both parts as float32, mixed precision keeps float64 values with float32 tangents,
+# halving the memory of the tangents of large batches (but not their computation, see precision)
+PRECISIONS = {
+    "double": (np.float64, np.float64),
+    "single": (np.float32, np.float32),
+    "mixed": (np.float64, np.float32),
+}
+
+# The (real, dual) dtypes of the active precision, None in double precision. A context variable, so
+# that each thread (and asyncio task) has its own
+_precision = ContextVar("precision", default=None)
+
+# The number of precision contexts active in any thread. While there is one, DualNumber.__init__ is
+# replaced by _init_cast, which looks up the policy of its thread, so that outside of them creating a
+# dual number costs nothing more
+_active = 0
+_active_lock = threading.Lock()
+
+
+@contextmanager
+def precision(name):
+    """Context in which the array parts of the dual numbers created are cast to the dtypes of a
+    precision of PRECISIONS, so that the policy carries through every operator and elementary (scalar
+    parts are left as they are). The policy applies to the current thread (or asyncio task) only, so
+    threads computing gradients concurrently each keep their own.
+
+    Accuracy: the unit roundoff of float32 is u = 2^-24 (about 6e-8), and each operation rounds the
+    tangents it stores once, so after k operations their relative error is of the order of k u, times
+    the conditioning of the function: about 1e-6 to 1e-5 for functions of a few dozen operations. In
+    single precision the values are also rounded, so derivative factors computed from them (e.g.
+    1 - logistic(x) near saturation, or the difference of nearly equal values) can lose all their digits.
+    Mixed precision computes the values and the factors in float64, and only rounds the stored tangents.
+
+    Cost: single precision halves both the memory and the arithmetic of the values and tangents. Mixed
+    precision only saves memory: the products of the float32 tangents with the float64 factors are
+    computed in float64 by NumPy and then rounded, which costs an extra pass over each tangent, so it is
+    somewhat slower than double precision.
+
+    :param name: "double", "single" or "mixed"
+    :type name: str
+    :raises ValueError: If the precision is unknown
+    """
+    global _active
+    if name not in PRECISIONS:
+        raise ValueError(f"Unknown precision `{name}`, expected one of {list(PRECISIONS)}")
+    token = _precision.set(None if name == "double" else PRECISIONS[name])
+    with _active_lock:
+        _active += 1
+        DualNumber.__init__ = _init_cast
+    try:
+        yield
+    finally:
+        with _active_lock:
+            _active -= 1
+            if not _active:
+                DualNumber.__init__ = _init
+        _precision.reset(token)
+
+
+def _cast(real, dual, dtypes):
+    """Casts the array parts of a dual number to the (real, dual) dtypes of the active precision"""
+    real_dtype, dual_dtype = dtypes
+    if isinstance(real, np.ndarray) and real.dtype != real_dtype:
+        real = real.astype(real_dtype)
+    if isinstance(dual, np.ndarray) and dual.dtype != dual_dtype:
+        dual = dual.astype(dual_dtype)
+    return real, dual
+
+
+# Scalars a dual number can be raised to the power of, or raise: NumPy scalars included, e.g. an
+# element of a float32 batch in single precision
+_SCALARS = (int, float, np.number)
+
+# Constants a dual number can be combined with. Arrays of constants (e.g. a batch of data) hold one
+# value per point of a batch, and broadcast against the trailing axes of the dual part. Object arrays
+# (of dual numbers) are not constants
+_CONSTANTS = _SCALARS + (np.ndarray,)
+
+
 class DualNumber:
     """Dual number implementation
 
-    :param real: The real part of the dual number
-    :type real: Union[int, float]
-    :param dual: The dual part of the dual number, defaults to 1
-    :type dual: Union[int, float], optional
+    :param real: The real part of the dual number. A NumPy array evaluates a batch of points at once
+    :type real: Union[int, float, np.ndarray]
+    :param dual: The dual part of the dual number, defaults to 1. A NumPy array holds one
+        tangent per seeded direction (vector mode), all propagated by the same operations. With a
+        batched real part, the directions run along the first axis of the dual part
+    :type dual: Union[int, float, np.ndarray], optional
     """
 
+    # A fixed attribute layout instead of a per-instance __dict__: dual numbers are created for
+    # every intermediate result, so their allocation is the hot path of differentiation
+    __slots__ = ("real", "dual")
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Computes NumPy ufuncs of dual numbers (e.g. np.sin(x), or an array of constants times x) with
+        the elementaries of functions.py and the operators below, so NumPy code can be differentiated
+        unchanged and stays vectorized over the arrays held by the dual numbers. Object arrays of dual
+        numbers are computed element by element by NumPy.
+
+        :param ufunc: The ufunc called
+        :type ufunc: np.ufunc
+        :param method: How the ufunc is called, only "__call__" is supported
+        :type method: str
+        :return: The result of the ufunc, or NotImplemented if it is not supported
+        :rtype: DualNumber
+        """
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        if any(isinstance(x, np.ndarray) and x.dtype == object for x in inputs):
+            inputs = [np.array(x, dtype=object) if isinstance(x, DualNumber) else x for x in inputs]
+            return ufunc(*inputs)
+        if ufunc in _ELEMENTARY_UFUNCS:
+            return _ELEMENTARY_UFUNCS[ufunc](*inputs)
+        if ufunc is np.negative:
+            return -self
+        if ufunc in _OPERATOR_UFUNCS and len(inputs) == 2:
+            left, right = _OPERATOR_UFUNCS[ufunc]
+            if inputs[0] is self:
+                return getattr(self, left)(inputs[1])
+            return getattr(self, right)(inputs[0])
+        return NotImplemented
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Computes np.sum, np.mean and the linear algebra functions of linalg.py (np.dot, np.matmul,
+        np.linalg.solve and np.linalg.norm) of dual numbers
+
+        :param func: The NumPy function called
+        :type func: Callable
+        :return: The result of the function, or NotImplemented if it is not supported
+        :rtype: DualNumber
+        """
+        if func not in _ARRAY_FUNCTIONS:
+            return NotImplemented
+        return _ARRAY_FUNCTIONS[func](*args, **kwargs)
+
+    # NumPy computes the ufuncs of object arrays of dual numbers by calling the method of the same name of
+    # each element (np.sin(a) calls a[i].sin()), so the elementaries of functions.py are also methods
+
+    def sin(self):
+        """Computes the sine of the dual number with the elementary of functions.py
+
+        :return: sin(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.sin](self)
+
+    def cos(self):
+        """Computes the cosine of the dual number with the elementary of functions.py
+
+        :return: cos(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.cos](self)
+
+    def tan(self):
+        """Computes the tangent of the dual number with the elementary of functions.py
+
+        :return: tan(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.tan](self)
+
+    def arcsin(self):
+        """Computes the arcsine of the dual number with the elementary of functions.py
+
+        :return: arcsin(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.arcsin](self)
+
+    def arccos(self):
+        """Computes the arccosine of the dual number with the elementary of functions.py
+
+        :return: arccos(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.arccos](self)
+
+    def arctan(self):
+        """Computes the arctangent of the dual number with the elementary of functions.py
+
+        :return: arctan(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.arctan](self)
+
+    def exp(self):
+        """Computes the exponential of the dual number with the elementary of functions.py
+
+        :return: exp(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.exp](self)
+
+    def log(self):
+        """Computes the natural logarithm of the dual number with the elementary of functions.py
+
+        :return: log(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.log](self)
+
+    def sqrt(self):
+        """Computes the square root of the dual number with the elementary of functions.py
+
+        :return: sqrt(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.sqrt](self)
+
+    def sinh(self):
+        """Computes the hyperbolic sine of the dual number with the elementary of functions.py
+
+        :return: sinh(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.sinh](self)
+
+    def cosh(self):
+        """Computes the hyperbolic cosine of the dual number with the elementary of functions.py
+
+        :return: cosh(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.cosh](self)
+
+    def tanh(self):
+        """Computes the hyperbolic tangent of the dual number with the elementary of functions.py
+
+        :return: tanh(self)
+        :rtype: DualNumber
+        """
+        return _ELEMENTARY_UFUNCS[np.tanh](self)
+
     def __init__(self, real, dual=1):
         self.real = real
         self.dual = dual
@@ -16,78 +326,78 @@ class DualNumber:
     def __add__(self, other):
         """Implements the addition of dual numbers
 
-        :param other: A dual number or scalar
-        :type other: Union[DualNumber, Union[int, float]]
+        :param other: A dual number, scalar or array of constants
+        :type other: Union[DualNumber, Union[int, float, np.ndarray]]
         :return: The sum of self with other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float, DualNumber)):
-            raise TypeError(f"Unsupported type `{type(other)}`")
-        if isinstance(other, (int, float)):
-            # scalar numbers
-            return DualNumber(other + self.real, self.dual)
-        else:
-            # dual number
+        if isinstance(other, DualNumber):
             return DualNumber(self.real + other.real, self.dual + other.dual)
+        if isinstance(other, _CONSTANTS):
+            if isinstance(other, np.ndarray) and other.dtype == object:
+                # computed element by element by NumPy, through __array_ufunc__
+                return NotImplemented
+            return DualNumber(other + self.real, self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __sub__(self, other):
         """Implements the subtraction of dual numbers
 
-        :param other: A dual number or scalar
-        :type other: Union[DualNumber, Union[int, float]]
+        :param other: A dual number, scalar or array of constants
+        :type other: Union[DualNumber, Union[int, float, np.ndarray]]
         :return: The difference of self with other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float, DualNumber)):
-            raise TypeError(f"Unsupported type `{type(other)}`")
-        if isinstance(other, (int, float)):
-            # scalar numbers
-            return DualNumber(self.real - other, self.dual)
-        else:
-            # dual number
+        if isinstance(other, DualNumber):
             return DualNumber(self.real - other.real, self.dual - other.dual)
+        if isinstance(other, _CONSTANTS):
+            if isinstance(other, np.ndarray) and other.dtype == object:
+                # computed element by element by NumPy, through __array_ufunc__
+                return NotImplemented
+            return DualNumber(self.real - other, self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __mul__(self, other):
         """Implements the multiplication of dual numbers
 
-        :param other: A dual number or scalar
-        :type other: Union[DualNumber, Union[int, float]]
+        :param other: A dual number, scalar or array of constants
+        :type other: Union[DualNumber, Union[int, float, np.ndarray]]
         :return: The product of self with other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float, DualNumber)):
-            raise TypeError(f"Unsupported type `{type(other)}`")
-        if isinstance(other, (int, float)):
-            # scalar numbers
-            return DualNumber(other * self.real, other * self.dual)
-        else:
-            # dual number
+        if isinstance(other, DualNumber):
             return DualNumber(
                 self.real * other.real,
                 self.real * other.dual + self.dual * other.real
             )
+        if isinstance(other, _CONSTANTS):
+            if isinstance(other, np.ndarray) and other.dtype == object:
+                # computed element by element by NumPy, through __array_ufunc__
+                return NotImplemented
+            return DualNumber(other * self.real, other * self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __truediv__(self, other):
         """Implements the division of dual numbers
 
-        :param other: A dual number or scalar
-        :type other: Union[DualNumber, Union[int, float]]
+        :param other: A dual number, scalar or array of constants
+        :type other: Union[DualNumber, Union[int, float, np.ndarray]]
         :return: The division of self by other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float, DualNumber)):
-            raise TypeError(f"Unsupported type `{type(other)}`")
-        if isinstance(other, (int, float)):
-            # scalar numbers
-            return DualNumber(self.real / other, self.dual / other)
-        if other.real == 0:
-            raise ZeroDivisionError ("Division by zero is impossible")
-        else:
-            # dual number
+        if isinstance(other, DualNumber):
+            if _any(other.real == 0):
+                raise ZeroDivisionError ("Division by zero is impossible")
             return DualNumber(
                 self.real / other.real,
                 (self.dual * other.real - self.real * other.dual)/(other.real**2)
             )
+        if isinstance(other, _CONSTANTS):
+            if isinstance(other, np.ndarray) and other.dtype == object:
+                # computed element by element by NumPy, through __array_ufunc__
+                return NotImplemented
+            return DualNumber(self.real / other, self.dual / other)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __pow__(self, other):
         """Implements the power of dual numbers
@@ -97,20 +407,43 @@ class DualNumber:
         :return: self to the power of other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float, DualNumber)):
-            raise TypeError(f"Unsupported type `{type(other)}`")
-        if isinstance(other, (int, float)):
+        if isinstance(other, DualNumber):
+            new_real = self.real ** other.real
+            #new_dual = other.real * (self.real ** (other.real - 1)) * self.dual + np.log(self.real) * (self.real ** (other.real)) * other.dual
+            new_dual = other.real * self.dual * self.real ** (other.real - 1) + new_real * other.dual * np.log(self.real)
+            return DualNumber(new_real, new_dual)
+        if isinstance(other, _SCALARS):
             if other == 0:
                 return DualNumber(1,0)
-            new_real = self.real ** other.real
+            new_real = self.real ** other
             #new_dual = self.real ** (other.real - 1) * self.dual * self.real
             new_dual = other * self.dual * self.real ** (other - 1)
             return DualNumber(new_real, new_dual)
-        else:
-            new_real = self.real ** other.real
-            #new_dual = other.real * (self.real ** (other.real - 1)) * self.dual + np.log(self.real) * (self.real ** (other.real)) * other.dual
-            new_dual = other.real * self.dual * self.real ** (other.real - 1) + self.real ** other.real * other.dual * np.log(self.real)
-            return DualNumber(new_real, new_dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __matmul__(self, other):
+        """Implements the matrix product of dual numbers holding vectors or matrices
+
+        :param other: A dual number or array of constants
+        :type other: Union[DualNumber, np.ndarray]
+        :return: The product of self with other
+        :rtype: DualNumber
+        """
+        if isinstance(other, (DualNumber, np.ndarray)):
+            return _ARRAY_FUNCTIONS[np.matmul](self, other)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __rmatmul__(self, other):
+        """Implements the matrix product of an array of constants with a dual number
+
+        :param other: An array of constants
+        :type other: np.ndarray
+        :return: The product of other with self
+        :rtype: DualNumber
+        """
+        if isinstance(other, np.ndarray):
+            return _ARRAY_FUNCTIONS[np.matmul](other, self)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __neg__(self):
         """Implements unary negation operator for dual numbers
@@ -124,44 +457,52 @@ class DualNumber:
     def __radd__(self, other):
         """Implements the right addition of a dual number with a scalar
 
-        :param other: A scalar
-        :type other: Union[int, float]
+        :param other: A scalar or array of constants
+        :type other: Union[int, float, np.ndarray]
         :return: The sum of self and other
         :rtype: DualNumber
         """
-        return self.__add__(other)
+        if isinstance(other, _CONSTANTS):
+            return DualNumber(other + self.real, self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __rsub__(self, other):
         """Implements the subtraction of a dual number with a scalar
 
-        :param other: A scalar
-        :type other: Union[int, float]
+        :param other: A scalar or array of constants
+        :type other: Union[int, float, np.ndarray]
         :return: The difference of other and self
         :rtype: DualNumber
         """
-        return - self.__sub__(other)
+        if isinstance(other, _CONSTANTS):
+            return DualNumber(other - self.real, - self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __rmul__(self, other):
         """Implements the right multiplication of a dual number with a scalar
 
-        :param other: A scalar
-        :type other: Union[int, float]
+        :param other: A scalar or array of constants
+        :type other: Union[int, float, np.ndarray]
         :return: The product of self and other
         :rtype: DualNumber
         """
-        return self.__mul__(other)
+        if isinstance(other, _CONSTANTS):
+            return DualNumber(other * self.real, other * self.dual)
+        raise TypeError(f"Unsupported type `{type(other)}`")
 
     def __rtruediv__(self, other):
         """Implements division of a scalar by a dual number
 
-        :param other: A scalar
-        :type other: Union[int, float]
+        :param other: A scalar or array of constants
+        :type other: Union[int, float, np.ndarray]
         :return: The division of other by self
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float)):
+        if not isinstance(other, _CONSTANTS):
             raise TypeError(f"Unsupported type `{type(other)}`")
-        return DualNumber(other, 0) / self
+        if _any(self.real == 0):
+            raise ZeroDivisionError ("Division by zero is impossible")
+        return DualNumber(other / self.real, (- other * self.dual) / (self.real**2))
 
 
     def __rpow__(self, other):
@@ -172,9 +513,10 @@ class DualNumber:
         :return: other to the power of other
         :rtype: DualNumber
         """
-        if not isinstance(other, (int, float)):
+        if not isinstance(other, _SCALARS):
             raise TypeError(f"Unsupported type `{type(other)}`")
-        return DualNumber(other, 0) ** self
+        new_real = other ** self.real
+        return DualNumber(new_real, new_real * self.dual * np.log(other))
 
     def __iadd__(self, other):
         """Implements the in-place addition of dual numbers
@@ -308,6 +650,20 @@ class DualNumber:
 
 
 
+# The constructor of dual numbers outside of precision contexts
+_init = DualNumber.__init__
+
+
+def _init_cast(self, real, dual=1):
+    """The constructor of dual numbers while a precision context is active in some thread, casting the
+    parts of the dual numbers holding arrays (e.g. batches) to the dtypes of the policy of the thread"""
+    if isinstance(real, np.ndarray):
+        dtypes = _precision.get()
+        if dtypes is not None:
+            real, dual = _cast(real, dual, dtypes)
+    self.real = real
+    self.dual = dual
+
 
 
 
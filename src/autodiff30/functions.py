@@ -1,7 +1,65 @@
-from autodiff30.dual import DualNumber
+from autodiff30.dual import DualNumber, _all, _any, _ELEMENTARY_UFUNCS
+from functools import wraps
 import numpy as np
 
 
+def _elementary(f):
+    """Decorator letting an elementary function also act on the other number types of the
+    package (e.g. reverse mode nodes). Dual numbers go straight to the dual implementation,
+    any other type receives the elementary through its `_elementary` method, and can evaluate
+    it on dual numbers to get values and derivatives.
+
+    :param f: The dual number implementation of an elementary function
+    :type f: Callable[[DualNumber], DualNumber]
+    ...
+    :return: The elementary function dispatching on the type of its argument
+    :rtype: Callable
+    """
+
+    @wraps(f)
+    def dispatch(x, *args, **kwargs):
+        if isinstance(x, DualNumber):
+            return f(x, *args, **kwargs)
+        return x._elementary(dispatch, *args, **kwargs)
+
+    return dispatch
+
+
+def _check_tan(x):
+    """Raises a ValueError where tan is not defined, x being the value of the argument"""
+    if _any((x - np.pi / 2) % np.pi == 0):
+        raise ValueError("Tan is not defined on odd multiple of pi/2")
+
+
+def _check_arccos(x):
+    """Raises a ValueError where arccos is not differentiable, x being the value of the argument"""
+    if not _all((x > -1) & (x < 1)):
+        raise ValueError("Arccos is not differentiable outside [-1,1]")
+
+
+def _check_arcsin(x):
+    """Raises a ValueError where arcsin is not differentiable, x being the value of the argument"""
+    if not _all((x > -1) & (x < 1)):
+        raise ValueError("Arcsin is not differentiable outside [-1,1]")
+
+
+def _check_log(x, base=np.e):
+    """Raises a TypeError or ValueError where log is not defined, x being the value of the argument"""
+    if not isinstance(base, (int, float)):
+        raise TypeError(f"Unsupported base type `{type(base)}`")
+    if base <= 1:
+        raise ValueError("Log is not defined on base <=1")
+    if not _all(x > 0):
+        raise ValueError("Log is not defined outside [0,inf]")
+
+
+def _check_sqrt(x):
+    """Raises a ValueError where sqrt is not differentiable, x being the value of the argument"""
+    if not _all(x > 0):
+        raise ValueError("Sqrt is not differentiable outside [0,inf]")
+
+
+@_elementary
 def sin(x):
     """An implementation of the trigonometric function sine for dual numbers
 
@@ -16,6 +74,7 @@ def sin(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def cos(x):
     """An implementation of the trigonometric function cosine for dual numbers
 
@@ -30,6 +89,7 @@ def cos(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def tan(x):
     """An implementation of the trigonometric function tangent for dual numbers
 
@@ -39,14 +99,13 @@ def tan(x):
     :return: A dual number that is tan(x)
     :rtype: class `DualNumber`
     """
-    if (x.real - np.pi / 2) % np.pi == 0:
-        raise ValueError("Tan is not defined on odd multiple of pi/2")
-    else:
-        new_real = np.tan(x.real)
-        new_dual = x.dual * (1 / (np.cos(x.real) ** 2))
-        return DualNumber(new_real, new_dual)
+    _check_tan(x.real)
+    new_real = np.tan(x.real)
+    new_dual = x.dual * (1 / (np.cos(x.real) ** 2))
+    return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def arccos(x):
     """An implementation of the inverse trigonometric function arccosine for dual numbers
 
@@ -56,14 +115,13 @@ def arccos(x):
     :return: A dual number that is arccos(x)
     :rtype: class `DualNumber`
     """
-    if x.real > -1 and x.real < 1:
-        new_real = np.arccos(x.real)
-        new_dual = x.dual * (-1 / (np.sqrt(1 - x.real**2)))
-        return DualNumber(new_real, new_dual)
-    else:
-        raise ValueError("Arccos is not differentiable outside [-1,1]")
+    _check_arccos(x.real)
+    new_real = np.arccos(x.real)
+    new_dual = x.dual * (-1 / (np.sqrt(1 - x.real**2)))
+    return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def arcsin(x):
     """An implementation of the inverse trigonometric function arcsine for dual numbers
 
@@ -73,14 +131,13 @@ def arcsin(x):
     :return: A dual number that is arcsin(x)
     :rtype: class `DualNumber`
     """
-    if x.real > -1 and x.real < 1:
-        new_real = np.arcsin(x.real)
-        new_dual = x.dual * (1 / (np.sqrt(1 - x.real**2)))
-        return DualNumber(new_real, new_dual)
-    else:
-        raise ValueError("Arcsin is not differentiable outside [-1,1]")
+    _check_arcsin(x.real)
+    new_real = np.arcsin(x.real)
+    new_dual = x.dual * (1 / (np.sqrt(1 - x.real**2)))
+    return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def arctan(x):
     """An implementation of the inverse trigonometric function arctangent for dual numbers
 
@@ -95,6 +152,7 @@ def arctan(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def exp(x):
     """An implementation of the exponential e^x function for dual numbers
 
@@ -105,10 +163,11 @@ def exp(x):
     :rtype: class `DualNumber`
     """
     new_real = np.exp(x.real)
-    new_dual = x.dual * np.exp(x.real)
+    new_dual = x.dual * new_real
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def log(x, base=np.e):
     """An implementation of the logarithmic function for dual numbers
 
@@ -120,18 +179,15 @@ def log(x, base=np.e):
     :return: A dual number that is log_{base}(x)
     :rtype: class `DualNumber`
     """
-    if not isinstance(base, (int, float)):
-        raise TypeError(f"Unsupported base type `{type(base)}`")
-    if base <= 1:
-        raise ValueError("Log is not defined on base <=1")
-    if x.real > 0:
-        new_real = np.log(x.real) / np.log(base)
-        new_dual = x.dual * 1 / x.real / np.log(base)
-        return DualNumber(new_real, new_dual)
-    else:
-        raise ValueError("Log is not defined outside [0,inf]")
+    _check_log(x.real, base)
+    # a Python float, which keeps the dtype of float32 arrays
+    log_base = float(np.log(base))
+    new_real = np.log(x.real) / log_base
+    new_dual = x.dual * 1 / x.real / log_base
+    return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def sqrt(x):
     """An implementation of the square root function for dual numbers
 
@@ -141,12 +197,10 @@ def sqrt(x):
     :return: A dual number that is sqrt(x)
     :rtype: class `DualNumber`
     """
-    if x.real > 0:
-        new_real = np.sqrt(x.real)
-        new_dual = x.dual * 1 / (2 * np.sqrt(x.real))
-        return DualNumber(new_real, new_dual)
-    else:
-        raise ValueError("Sqrt is not differentiable outside [0,inf]")
+    _check_sqrt(x.real)
+    new_real = np.sqrt(x.real)
+    new_dual = x.dual * 1 / (2 * new_real)
+    return DualNumber(new_real, new_dual)
 
 
 def sigmoid_real(x):
@@ -161,6 +215,7 @@ def sigmoid_real(x):
     return 1 / (1 + np.exp(-x))
 
 
+@_elementary
 def logistic(x):
     """An implementation of the logistic function for dual numbers
 
@@ -175,6 +230,7 @@ def logistic(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def sinh(x):
     """An implementation of the hyperbolic sinh function for dual numbers
 
@@ -189,6 +245,7 @@ def sinh(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def cosh(x):
     """An implementation of the hyperbolic cosh function for dual numbers
 
@@ -203,6 +260,7 @@ def cosh(x):
     return DualNumber(new_real, new_dual)
 
 
+@_elementary
 def tanh(x):
     """An implementation of the hyperbolic tanh function for dual numbers
 
@@ -213,10 +271,72 @@ def tanh(x):
     :rtype: class `DualNumber`
     """
     new_real = np.tanh(x.real)
-    new_dual = x.dual * (1 / (np.cosh(x.real) ** 2))  # sech^2(x)
+    # sech^2(x) rather than 1 - tanh(x)^2 from the value, which cancels to 0 as tanh saturates
+    new_dual = x.dual / np.cosh(x.real) ** 2
     return DualNumber(new_real, new_dual)
 
 
+def sincos(x):
+    """Computes sin(x) and cos(x) together, each transcendental being evaluated once for both the
+    values and the derivatives, instead of twice by separate calls to sin and cos
+
+    :param x: A dual number, or any number type supported by the elementaries
+    :type x: class `DualNumber`
+    ...
+    :return: The dual numbers sin(x) and cos(x)
+    :rtype: Tuple[DualNumber, DualNumber]
+    """
+    if not isinstance(x, DualNumber):
+        return sin(x), cos(x)
+    s, c = np.sin(x.real), np.cos(x.real)
+    return DualNumber(s, x.dual * c), DualNumber(c, x.dual * (-s))
+
+
+def sinhcosh(x):
+    """Computes sinh(x) and cosh(x) together, each transcendental being evaluated once for both the
+    values and the derivatives, instead of twice by separate calls to sinh and cosh
+
+    :param x: A dual number, or any number type supported by the elementaries
+    :type x: class `DualNumber`
+    ...
+    :return: The dual numbers sinh(x) and cosh(x)
+    :rtype: Tuple[DualNumber, DualNumber]
+    """
+    if not isinstance(x, DualNumber):
+        return sinh(x), cosh(x)
+    s, c = np.sinh(x.real), np.cosh(x.real)
+    return DualNumber(s, x.dual * c), DualNumber(c, x.dual * s)
+
+
+# The NumPy ufuncs computed by the elementaries, dispatched to them by DualNumber.__array_ufunc__ and
+# by the methods NumPy calls on the elements of object arrays of dual numbers
+_ELEMENTARY_UFUNCS.update({
+    np.sin: sin,
+    np.cos: cos,
+    np.tan: tan,
+    np.arcsin: arcsin,
+    np.arccos: arccos,
+    np.arctan: arctan,
+    np.exp: exp,
+    np.log: log,
+    np.sqrt: sqrt,
+    np.sinh: sinh,
+    np.cosh: cosh,
+    np.tanh: tanh,
+})
+
+
+# The domain checks of the elementaries, on the value of their argument and their extra arguments, for
+# the number types that compute an elementary without evaluating its dual number implementation
+_DOMAINS = {
+    tan: _check_tan,
+    arccos: _check_arccos,
+    arcsin: _check_arcsin,
+    log: _check_log,
+    sqrt: _check_sqrt,
+}
+
+
 if __name__ == "__main__":
     x = DualNumber(50, 1)
     res = tan(x) * exp(sin(x)) - cos(x**0.5) * sin((cos(x) ** 2.0 + x**2.0) ** 0.5)
@@ -0,0 +1,321 @@
+#!/usr/env/bin python3
+import numpy as np
+from .dual import DualNumber, _any
+from . import functions as adf
+
+
+# Second derivatives of the elementaries, given the point a, the value f(a) and the extra
+# arguments of the elementary. The value and first derivative come from the dual number
+# implementation, which also performs the domain checks.
+_SECOND_DERIVATIVES = {
+    adf.sin: lambda a, y: -y,
+    adf.cos: lambda a, y: -y,
+    adf.tan: lambda a, y: 2 * y / (np.cos(a) ** 2),
+    adf.arccos: lambda a, y: -a / (1 - a**2) ** 1.5,
+    adf.arcsin: lambda a, y: a / (1 - a**2) ** 1.5,
+    adf.arctan: lambda a, y: -2 * a / (1 + a**2) ** 2,
+    adf.exp: lambda a, y: y,
+    adf.log: lambda a, y, base=np.e: -1 / (a**2 * np.log(base)),
+    adf.sqrt: lambda a, y: -1 / (4 * a * y),
+    adf.logistic: lambda a, y: y * (1 - y) * (1 - 2 * y),
+    adf.sinh: lambda a, y: y,
+    adf.cosh: lambda a, y: y,
+    adf.tanh: lambda a, y: -2 * y / (np.cosh(a) ** 2),
+}
+
+
+class HyperDualNumber:
+    """Hyper-dual number implementation, a + b ε1 + c ε2 + d ε1ε2 with ε1² = ε2² = 0 and ε1ε2 ≠ 0.
+    Seeding ε1 and ε2 with two directions u and w, the ε1ε2 part of f(x) is the second derivative
+    uᵀ H w, exact to machine precision (no truncation or cancellation error).
+
+    The parts may be NumPy arrays: seeding ε1 along the rows and ε2 along the columns of an array
+    gives the whole Hessian in the ε1ε2 part with a single evaluation.
+
+    :param real: The real part
+    :type real: Union[int, float, np.ndarray]
+    :param eps1: The ε1 part, defaults to 0
+    :type eps1: Union[int, float, np.ndarray], optional
+    :param eps2: The ε2 part, defaults to 0
+    :type eps2: Union[int, float, np.ndarray], optional
+    :param eps12: The ε1ε2 part, defaults to 0
+    :type eps12: Union[int, float, np.ndarray], optional
+    """
+
+    __slots__ = ("real", "eps1", "eps2", "eps12")
+
+    def __init__(self, real, eps1=0, eps2=0, eps12=0):
+        self.real = real
+        self.eps1 = eps1
+        self.eps2 = eps2
+        self.eps12 = eps12
+
+    def _chain(self, value, first, second):
+        """Applies a scalar function to self through the chain rule
+
+        :param value: The value of the function at the real part
+        :param first: Its first derivative at the real part
+        :param second: Its second derivative at the real part
+        :return: The function of self
+        :rtype: HyperDualNumber
+        """
+        return HyperDualNumber(
+            value,
+            first * self.eps1,
+            first * self.eps2,
+            first * self.eps12 + second * self.eps1 * self.eps2,
+        )
+
+    def _elementary(self, f, *args, **kwargs):
+        """Applies an elementary function of functions.py to the hyper-dual number
+
+        :param f: The elementary, which can be evaluated on dual numbers
+        :type f: Callable[[DualNumber], DualNumber]
+        :return: f(self)
+        :rtype: HyperDualNumber
+        """
+        d = f(DualNumber(self.real, 1.0), *args, **kwargs)
+        second = _SECOND_DERIVATIVES[f](self.real, d.real, *args, **kwargs)
+        return self._chain(d.real, d.dual, second)
+
+    def __add__(self, other):
+        """Implements the addition of hyper-dual numbers
+
+        :param other: A hyper-dual number or scalar
+        :type other: Union[HyperDualNumber, Union[int, float]]
+        :return: The sum of self with other
+        :rtype: HyperDualNumber
+        """
+        if isinstance(other, HyperDualNumber):
+            return HyperDualNumber(
+                self.real + other.real,
+                self.eps1 + other.eps1,
+                self.eps2 + other.eps2,
+                self.eps12 + other.eps12,
+            )
+        if isinstance(other, (int, float)):
+            return HyperDualNumber(other + self.real, self.eps1, self.eps2, self.eps12)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __sub__(self, other):
+        """Implements the subtraction of hyper-dual numbers
+
+        :param other: A hyper-dual number or scalar
+        :type other: Union[HyperDualNumber, Union[int, float]]
+        :return: The difference of self with other
+        :rtype: HyperDualNumber
+        """
+        if isinstance(other, HyperDualNumber):
+            return HyperDualNumber(
+                self.real - other.real,
+                self.eps1 - other.eps1,
+                self.eps2 - other.eps2,
+                self.eps12 - other.eps12,
+            )
+        if isinstance(other, (int, float)):
+            return HyperDualNumber(self.real - other, self.eps1, self.eps2, self.eps12)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __mul__(self, other):
+        """Implements the multiplication of hyper-dual numbers
+
+        :param other: A hyper-dual number or scalar
+        :type other: Union[HyperDualNumber, Union[int, float]]
+        :return: The product of self with other
+        :rtype: HyperDualNumber
+        """
+        if isinstance(other, HyperDualNumber):
+            return HyperDualNumber(
+                self.real * other.real,
+                self.real * other.eps1 + self.eps1 * other.real,
+                self.real * other.eps2 + self.eps2 * other.real,
+                self.real * other.eps12
+                + self.eps1 * other.eps2
+                + self.eps2 * other.eps1
+                + self.eps12 * other.real,
+            )
+        if isinstance(other, (int, float)):
+            return HyperDualNumber(other * self.real, other * self.eps1, other * self.eps2, other * self.eps12)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def _reciprocal(self):
+        """Computes 1 / self
+
+        :return: The inverse of self
+        :rtype: HyperDualNumber
+        """
+        if _any(self.real == 0):
+            raise ZeroDivisionError("Division by zero is impossible")
+        inverse = 1 / self.real
+        return self._chain(inverse, -inverse**2, 2 * inverse**3)
+
+    def __truediv__(self, other):
+        """Implements the division of hyper-dual numbers
+
+        :param other: A hyper-dual number or scalar
+        :type other: Union[HyperDualNumber, Union[int, float]]
+        :return: The division of self by other
+        :rtype: HyperDualNumber
+        """
+        if isinstance(other, HyperDualNumber):
+            return self * other._reciprocal()
+        if isinstance(other, (int, float)):
+            return HyperDualNumber(self.real / other, self.eps1 / other, self.eps2 / other, self.eps12 / other)
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __pow__(self, other):
+        """Implements the power of hyper-dual numbers
+
+        :param other: A hyper-dual number or scalar
+        :type other: Union[HyperDualNumber, Union[int, float]]
+        :return: self to the power of other
+        :rtype: HyperDualNumber
+        """
+        if isinstance(other, HyperDualNumber):
+            # a^b = exp(b log(a)), with the log taken without domain check like DualNumber.__pow__
+            log = self._chain(np.log(self.real), 1 / self.real, -1 / self.real**2)
+            return adf.exp(other * log)
+        if isinstance(other, (int, float)):
+            if other == 0:
+                return HyperDualNumber(1)
+            if other == 1:
+                # the second derivative vanishes, and real**(other - 2) would divide by zero at 0
+                return self._chain(self.real, 1, 0)
+            return self._chain(
+                self.real**other,
+                other * self.real ** (other - 1),
+                other * (other - 1) * self.real ** (other - 2),
+            )
+        raise TypeError(f"Unsupported type `{type(other)}`")
+
+    def __neg__(self):
+        """Implements unary negation operator for hyper-dual numbers
+
+        :return: Minus self
+        :rtype: HyperDualNumber
+        """
+        return HyperDualNumber(-self.real, -self.eps1, -self.eps2, -self.eps12)
+
+    def __radd__(self, other):
+        """Implements the right addition of a hyper-dual number with a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The sum of other and self
+        :rtype: HyperDualNumber
+        """
+        return self.__add__(other)
+
+    def __rsub__(self, other):
+        """Implements the subtraction of a hyper-dual number from a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The difference of other and self
+        :rtype: HyperDualNumber
+        """
+        return (-self).__add__(other)
+
+    def __rmul__(self, other):
+        """Implements the right multiplication of a hyper-dual number with a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The product of other and self
+        :rtype: HyperDualNumber
+        """
+        return self.__mul__(other)
+
+    def __rtruediv__(self, other):
+        """Implements the division of a scalar by a hyper-dual number
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The division of other by self
+        :rtype: HyperDualNumber
+        """
+        if not isinstance(other, (int, float)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        return other * self._reciprocal()
+
+    def __rpow__(self, other):
+        """Implements the power of a scalar to a hyper-dual number
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: other to the power of self
+        :rtype: HyperDualNumber
+        """
+        if not isinstance(other, (int, float)):
+            raise TypeError(f"Unsupported type `{type(other)}`")
+        value = other**self.real
+        log = np.log(other)
+        return self._chain(value, value * log, value * log**2)
+
+    def __str__(self):
+        """Prints the hyper-dual number
+
+        :return: A string representing the hyper-dual number
+        :rtype: str
+        """
+        return f"({self.real}, {self.eps1}, {self.eps2}, {self.eps12})"
+
+    def __eq__(self, other):
+        """Implements the equality of hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real parts are equal, else False
+        :rtype: bool
+        """
+        return self.real == other.real
+
+    def __ne__(self, other):
+        """Implements the inequality of hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real parts are different, else False
+        :rtype: bool
+        """
+        return self.real != other.real
+
+    def __ge__(self, other):
+        """Implements greater than or equal to for hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real part of self is greater than or equal to that of other, else False
+        :rtype: bool
+        """
+        return self.real >= other.real
+
+    def __le__(self, other):
+        """Implements lower than or equal to for hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real part of self is lower than or equal to that of other, else False
+        :rtype: bool
+        """
+        return self.real <= other.real
+
+    def __gt__(self, other):
+        """Implements greater than for hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real part of self is greater than that of other, else False
+        :rtype: bool
+        """
+        return self.real > other.real
+
+    def __lt__(self, other):
+        """Implements lower than for hyper-dual numbers, considering the real part only
+
+        :param other: A hyper-dual number
+        :type other: HyperDualNumber
+        :return: True if the real part of self is lower than that of other, else False
+        :rtype: bool
+        """
+        return self.real < other.real
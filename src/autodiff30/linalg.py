@@ -0,0 +1,222 @@
+#!/usr/env/bin python3
+import numpy as np
+from .dual import DualNumber, _tangent, _ARRAY_FUNCTIONS
+
+
+# Linear algebra on dual numbers holding vectors and matrices. The dual part of an operand holds its
+# tangents along the leading directions axes, followed by the shape of its real part. Each primitive
+# computes its value and all its tangents with a few BLAS/LAPACK calls on the real and dual arrays,
+# instead of one DualNumber operation per scalar multiplication.
+#
+# The primitives are forward mode only: they compute on DualNumber arrays, and raise TypeError on the
+# other number types of the package, so functions using them cannot be differentiated in reverse mode,
+# compiled, or given to hessian, hvp, vjp, sparse_jacobian or derivatives.
+
+
+def pack(x):
+    """Gathers a list (or nested lists, or object array) of scalar dual numbers into a single dual
+    number holding the array of their values, with the directions axes leading its dual part. Scalars
+    of the list are constants, with a zero tangent. Arrays of constants and dual numbers are returned
+    as they are.
+
+    :param x: The values to gather, e.g. the list of inputs adstruc passes to its function
+    :type x: Union[DualNumber, np.ndarray, List[Union[DualNumber, int, float]]]
+    :raises TypeError: If x holds numbers other than dual numbers and scalars, e.g. the nodes of reverse
+        mode or hyper-dual numbers, which the primitives do not support
+    :return: The dual number holding the values, or the array of constants if none is a dual number
+    :rtype: Union[DualNumber, np.ndarray]
+    """
+    if isinstance(x, DualNumber) or (isinstance(x, np.ndarray) and x.dtype != object):
+        return x
+    items = np.array(x, dtype=object)
+    flat = items.ravel()
+    for elt in flat:
+        if not isinstance(elt, (DualNumber, int, float, np.number)):
+            raise TypeError(
+                f"The linalg primitives are forward mode only, and do not support `{type(elt).__name__}`: "
+                "functions using them cannot be differentiated in reverse mode, compiled, or given to "
+                "hessian, hvp, vjp, sparse_jacobian or derivatives"
+            )
+    duals = [elt for elt in flat if isinstance(elt, DualNumber)]
+    if not duals:
+        return items.astype(float)
+    directions = max((np.shape(elt.dual) for elt in duals), key=len)
+    real = np.empty(flat.size)
+    dual = np.zeros((flat.size,) + directions)
+    for i, elt in enumerate(flat):
+        if isinstance(elt, DualNumber):
+            real[i], dual[i] = elt.real, elt.dual
+        else:
+            real[i] = elt
+    return DualNumber(real.reshape(items.shape), np.moveaxis(dual, 0, -1).reshape(directions + items.shape))
+
+
+def unpack(x):
+    """Splits a dual number holding a vector into the list of the scalar dual numbers of its elements
+
+    :param x: A dual number holding a vector
+    :type x: DualNumber
+    :return: The dual numbers of the elements
+    :rtype: List[DualNumber]
+    """
+    tangent = _tangent(x)
+    return [DualNumber(real, tangent[..., i]) for i, real in enumerate(x.real.tolist())]
+
+
+def _real(x):
+    """Returns the real part of a dual number, or x as an array of constants"""
+    return x.real if isinstance(x, DualNumber) else np.asarray(x, dtype=float)
+
+
+def _left_product(tangent, b):
+    """Computes the product of the tangents of an operand with the constant right operand b with a
+    single matrix product, stacking the directions along the rows
+
+    :param tangent: The tangents, of shape directions + shape of the operand
+    :type tangent: np.ndarray
+    :param b: The right operand, a vector or matrix
+    :type b: np.ndarray
+    :return: The tangents of the product
+    :rtype: np.ndarray
+    """
+    rows = tangent.reshape(-1, tangent.shape[-1])
+    return (rows @ b).reshape(tangent.shape[:-1] + b.shape[1:])
+
+
+def _right_product(a, tangent, ndim):
+    """Computes the product of the constant left operand a with the tangents of an operand with a
+    single matrix product, stacking the directions along the columns
+
+    :param a: The left operand, a vector or matrix
+    :type a: np.ndarray
+    :param tangent: The tangents, of shape directions + shape of the operand
+    :type tangent: np.ndarray
+    :param ndim: The number of dimensions of the operand
+    :type ndim: int
+    :return: The tangents of the product
+    :rtype: np.ndarray
+    """
+    if ndim == 1:
+        # each direction of a vector is a row, so the product is taken with a transposed
+        return _left_product(tangent, a.T)
+    directions = tangent.shape[:-2]
+    k, m = tangent.shape[-2:]
+    columns = np.moveaxis(tangent.reshape((-1, k, m)), 0, 1).reshape(k, -1)
+    product = (a @ columns).reshape(a.shape[:-1] + (-1, m))
+    return np.moveaxis(product, -2, 0).reshape(directions + a.shape[:-1] + (m,))
+
+
+def matmul(a, b):
+    """Computes the matrix product a @ b of vectors and matrices, with the tangents of each dual
+    operand multiplied by the other operand in a single matrix product
+
+    :param a: The left operand, a vector or matrix
+    :type a: Union[DualNumber, np.ndarray, List[DualNumber]]
+    :param b: The right operand, a vector or matrix
+    :type b: Union[DualNumber, np.ndarray, List[DualNumber]]
+    :return: The product a @ b
+    :rtype: DualNumber
+    """
+    a, b = pack(a), pack(b)
+    a_real, b_real = _real(a), _real(b)
+    if a_real.ndim not in (1, 2) or b_real.ndim not in (1, 2):
+        raise ValueError("Matrix products of dual numbers are only supported for 1-D and 2-D operands")
+    dual = 0
+    if isinstance(a, DualNumber):
+        dual = dual + _left_product(_tangent(a), b_real)
+    if isinstance(b, DualNumber):
+        dual = dual + _right_product(a_real, _tangent(b), b_real.ndim)
+    return DualNumber(a_real @ b_real, dual)
+
+
+def dot(a, b):
+    """Computes the dot product of a and b as np.dot: the matrix product of vectors and matrices, or
+    the product with a scalar
+
+    :param a: The left operand
+    :type a: Union[DualNumber, np.ndarray, List[DualNumber], int, float]
+    :param b: The right operand
+    :type b: Union[DualNumber, np.ndarray, List[DualNumber], int, float]
+    :return: The dot product of a and b
+    :rtype: DualNumber
+    """
+    a, b = pack(a), pack(b)
+    if np.ndim(_real(a)) == 0 or np.ndim(_real(b)) == 0:
+        return a * b
+    return matmul(a, b)
+
+
+def solve(a, b):
+    """Solves the linear system a x = b. The tangents of x solve a dx = db - da x, so a is factorized
+    once for the value and all the tangents, solved together as extra right-hand sides
+
+    :param a: The square matrix of the system
+    :type a: Union[DualNumber, np.ndarray, List[List[DualNumber]]]
+    :param b: The right-hand side, a vector or matrix
+    :type b: Union[DualNumber, np.ndarray, List[DualNumber]]
+    :return: The solution x
+    :rtype: DualNumber
+    """
+    a, b = pack(a), pack(b)
+    a_real, b_real = _real(a), _real(b)
+    if not (isinstance(a, DualNumber) or isinstance(b, DualNumber)):
+        return np.linalg.solve(a_real, b_real)
+    x = np.linalg.solve(a_real, b_real)
+    rhs = 0
+    if isinstance(b, DualNumber):
+        rhs = rhs + _tangent(b)
+    if isinstance(a, DualNumber):
+        rhs = rhs - _left_product(_tangent(a), x)
+    directions = rhs.shape[: rhs.ndim - x.ndim]
+    # the right-hand sides of all the directions, as the columns of a single matrix
+    columns = np.moveaxis(rhs.reshape((-1,) + x.shape), 0, -1).reshape(x.shape[0], -1)
+    dx = np.linalg.solve(a_real, columns).reshape(x.shape + (-1,))
+    return DualNumber(x, np.moveaxis(dx, -1, 0).reshape(directions + x.shape))
+
+
+def norm(x, ord=None):
+    """Computes the Euclidean norm of a vector, or the Frobenius norm of a matrix. Its tangents are the
+    products of the tangents of x with x / norm(x), computed as a single matrix-vector product
+
+    :param x: A vector or matrix
+    :type x: Union[DualNumber, np.ndarray, List[DualNumber]]
+    :param ord: The order of the norm, only None, 2 for vectors and "fro" for matrices are supported,
+        defaults to None
+    :type ord: Union[int, str], optional
+    :raises ValueError: If the norm is 0, where it is not differentiable
+    :return: The norm of x
+    :rtype: DualNumber
+    """
+    x = pack(x)
+    real = _real(x)
+    if ord not in (None, 2, "fro") or (ord == 2 and real.ndim != 1) or (ord == "fro" and real.ndim != 2):
+        raise ValueError(f"Unsupported norm order `{ord}`, only the Euclidean and Frobenius norms are supported")
+    value = np.linalg.norm(real)
+    if not isinstance(x, DualNumber):
+        return value
+    if value == 0:
+        raise ValueError("The norm is not differentiable at 0")
+    tangent = _tangent(x)
+    directions = tangent.shape[: tangent.ndim - real.ndim]
+    dual = tangent.reshape(directions + (-1,)) @ (real.ravel() / value)
+    return DualNumber(value, dual)
+
+
+def _solve(a, b):
+    """Implements np.linalg.solve for dual numbers"""
+    return solve(a, b)
+
+
+def _norm(x, ord=None, axis=None, keepdims=False):
+    """Implements np.linalg.norm for dual numbers, over all the axes"""
+    if axis is not None or keepdims:
+        raise ValueError("The norm of dual numbers is only supported over all the axes")
+    return norm(x, ord)
+
+
+_ARRAY_FUNCTIONS.update({
+    np.dot: dot,
+    np.matmul: matmul,
+    np.linalg.solve: _solve,
+    np.linalg.norm: _norm,
+})
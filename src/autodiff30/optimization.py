@@ -1,31 +1,58 @@
 #!/usr/env/bin python3
+import inspect
 import numpy as np
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from .ad import adfunction
-from .dual import DualNumber
+
+
+#Result of LBFGS: the minimizer, the value and gradient norm there, the number of iterations, the number of
+#evaluations of the function and of its gradient, and whether the gradient norm reached epsilon
+OptimizeResult = namedtuple("OptimizeResult", ["x", "value", "grad_norm", "n_iter", "n_fev", "n_gev", "converged"])
+
+#Result of one run of multistart: the index of its starting point in starts, the starting point, the minimizer and
+#the value there, the result of the optimizer, and the exception raised by the optimizer (then x, value and result
+#are None)
+Run = namedtuple("Run", ["index", "start", "x", "value", "result", "error"])
+
+#Result of multistart: the run with the lowest value, the runs that completed ordered by index, and whether a run
+#reached the target
+MultistartResult = namedtuple("MultistartResult", ["best", "runs", "target_reached"])
+
+
+def _point(opt):
+    """
+    Returns the input to evaluate the function at: the scalar held by a 0-d parameter array, else the
+    array itself, so the parameters are never converted to Python lists
+    opt: float64 array of parameters
+    """
+    return opt.item() if opt.ndim == 0 else opt
 
 
 def GD(f, initial_guess, lr = 0.01, max_iter = 1000, epsilon = 1e-7):
     """
     GD is a basic gradient descent algorithm to minimize a function
     f: the function to optimize (f must have values in a space of dimension = 1)
-    initial_guess: (int, float, list) to start the gradient descent with
+    initial_guess: (int, float, list, np.ndarray) to start the gradient descent with
     lr: learning rate
     max_iter: maximum number of iteration
     epsilon: stopping condition
+    Returns the minimizer as a float64 array
     """
-    assert isinstance(initial_guess, (int, float, list))
+    assert isinstance(initial_guess, (int, float, list, np.ndarray))
 
-    #Check that the output dimension is 1
-    if not isinstance(f(initial_guess), (int, float)):
-        raise ValueError("For optimization, function output should be int or float. Consider optimizing the  norm of the function.")
+    #Parameters and update are float64 buffers allocated once and updated in place
+    opt = np.array(initial_guess, dtype=float)
+    update = np.empty_like(opt)
 
     #Optimize the given function with gradient descent
-    opt = np.array(initial_guess)
     for t in range(max_iter):
-        _grad = np.array(f.grad(opt.tolist()))
-        update = lr * _grad
-        _grad_norm = np.abs(np.linalg.norm(_grad.real)) if isinstance(_grad, DualNumber) else np.abs(np.linalg.norm(_grad))
-        _grad_norm = np.abs(np.linalg.norm(_grad))
+        value, _grad = f.value_and_grad(_point(opt))
+        #Check that the output dimension is 1
+        if t == 0 and not isinstance(value, (int, float)):
+            raise ValueError("For optimization, function output should be int or float. Consider optimizing the  norm of the function.")
+        np.multiply(lr, _grad, out=update)
+        _grad_norm = np.linalg.norm(_grad)
         if _grad_norm < epsilon:
             break
         if t == max_iter - 1:
@@ -35,35 +62,62 @@ def GD(f, initial_guess, lr = 0.01, max_iter = 1000, epsilon = 1e-7):
 
 
 
-def Adam(f, initial_guess, lr = 0.001, beta1 = 0.9, beta2 =0.999, max_iter = 1000, epsilon = 1e-7):
+def _adam_step(opt, _grad, m, v, t, lr, beta1, beta2, eps, step, scale):
+    """
+    Updates the parameters opt in place with the step of Adam at iteration t (from 1) on the gradient _grad
+    m, v: first and second moment estimates, updated in place
+    step, scale: float64 buffers of the shape of opt
+    """
+    #m = beta1 * m + (1 - beta1) * grad
+    m *= beta1
+    np.multiply(1 - beta1, _grad, out=step)
+    m += step
+    #v = beta2 * v + (1 - beta2) * grad**2
+    v *= beta2
+    np.multiply(_grad, _grad, out=step)
+    step *= 1 - beta2
+    v += step
+    #opt = opt - lr * m_ / (sqrt(v_) + eps), with m_ = m / (1 - beta1**t) and v_ = v / (1 - beta2**t)
+    np.divide(v, 1 - beta2**t, out=scale)
+    np.sqrt(scale, out=scale)
+    scale += eps
+    np.divide(m, 1 - beta1**t, out=step)
+    step *= lr
+    step /= scale
+    opt -= step
+
+
+def Adam(f, initial_guess, lr = 0.1, beta1 = 0.9, beta2 =0.999, max_iter = 1000, epsilon = 1e-7, eps = 1e-8):
     """
     Adam is an optimize and more advanced gradient descent algorithm to minimize a function
     f: the function to optimize (f must have values in a space of dimension = 1)
-    initial_guess: (int, float, list) to start the gradient descent with
-    lr: learning rate
-    beta1, beta2: hyperparameters
+    initial_guess: (int, float, list, np.ndarray) to start the gradient descent with
+    lr: learning rate, the size of the first steps
+    beta1, beta2: decay rates of the first and second moment estimates
     max_iter: maximum number of iteration
     epsilon: stopping condition
+    eps: added to the root of the second moment to divide the steps by
+    Returns the minimizer as a float64 array
     """
-    assert isinstance(initial_guess, (int, float, list))
-    #Check that the output dimension is 1
-    if not isinstance(f(initial_guess), (int, float)):
-        raise ValueError("For optimization, function output should be int or float. Consider optimizing the  norm of the function.")
+    assert isinstance(initial_guess, (int, float, list, np.ndarray))
+
+    #Parameters, moments and step are float64 buffers allocated once and updated in place
+    opt = np.array(initial_guess, dtype=float)
+    m = np.zeros_like(opt)
+    v = np.zeros_like(opt)
+    step = np.empty_like(opt)
+    scale = np.empty_like(opt)
 
     #Optimize the given function with Adam
     t = 0
-    m = 0
-    v = 0
-    opt = np.array(initial_guess)
     while t < max_iter:
         t +=1
-        _grad = np.array(f.grad(opt.tolist()))
-        m = beta1 * m + (1 - beta1) * _grad
-        b = beta2 * v + (1 - beta2) * _grad**2
-        m_ = m / (1 - beta1**t)
-        v_ = v / (1 - beta2**t)
-        opt = opt - lr * m_ / np.sqrt(v + 1e-7)
-        _grad_norm = np.abs(np.linalg.norm(_grad.real)) if isinstance(_grad, DualNumber) else np.abs(np.linalg.norm(_grad))
+        value, _grad = f.value_and_grad(_point(opt))
+        #Check that the output dimension is 1
+        if t == 1 and not isinstance(value, (int, float)):
+            raise ValueError("For optimization, function output should be int or float. Consider optimizing the  norm of the function.")
+        _adam_step(opt, _grad, m, v, t, lr, beta1, beta2, eps, step, scale)
+        _grad_norm = np.linalg.norm(_grad)
         if _grad_norm < epsilon:
             break
         if t == max_iter - 1:
@@ -72,7 +126,307 @@ def Adam(f, initial_guess, lr = 0.001, beta1 = 0.9, beta2 =0.999, max_iter = 100
 
 
 
+class MiniBatches:
+    """
+    MiniBatches splits a dataset into consecutive mini-batches of rows, which can be iterated over once per epoch
+    data: (np.ndarray, np.memmap) the rows of the dataset, e.g. np.load(path, mmap_mode="r")
+    batch_size: number of rows of each mini-batch (the last one may be smaller)
+    The mini-batches are views of data, so a memory-mapped dataset is read one mini-batch at a time and never
+    loaded as a whole
+    """
+
+    def __init__(self, data, batch_size):
+        assert batch_size > 0
+        self.data = data
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return -(-len(self.data) // self.batch_size)
+
+    def __iter__(self):
+        for start in range(0, len(self.data), self.batch_size):
+            yield self.data[start:start + self.batch_size]
+
+
+def _epochs(batches, epochs):
+    """
+    Yields the mini-batches of every epoch, iterating over batches again at each epoch
+    batches: iterable of mini-batches
+    epochs: number of passes over batches
+    """
+    for _ in range(epochs):
+        empty = True
+        for batch in batches:
+            empty = False
+            yield batch
+        if empty:
+            raise ValueError("No mini-batch to optimize on. A generator of mini-batches is exhausted after one epoch, use a re-iterable such as MiniBatches for several epochs.")
+
+
+def SGD(f, initial_guess, batches, lr = 0.01, epochs = 1, precision = "double"):
+    """
+    SGD is a mini-batch stochastic gradient descent algorithm to minimize the mean of a loss over a dataset
+    f: the loss (an adfunction of (params, batch) returning the loss of every row of the batch, see adstruc.loss_and_grad)
+    initial_guess: (int, float, list, np.ndarray) to start the gradient descent with
+    batches: iterable of mini-batches (e.g. MiniBatches or a generator of chunks of a memory-mapped file), iterated
+    over once per epoch, so that a single mini-batch is in memory at a time
+    lr: learning rate
+    epochs: number of passes over the mini-batches
+    precision: dtypes of the values and tangents of the gradients, "double", "single" or "mixed" (see adstruc.loss_and_grad),
+    the parameters and the optimizer state staying float64
+    Returns the parameters after the last mini-batch as a float64 array
+    """
+    assert isinstance(initial_guess, (int, float, list, np.ndarray))
+
+    opt = np.array(initial_guess, dtype=float)
+    update = np.empty_like(opt)
+
+    #One step per mini-batch, on the gradient of the mean loss over its rows
+    for batch in _epochs(batches, epochs):
+        _, _grad = f.loss_and_grad(_point(opt), batch, precision)
+        np.multiply(lr, _grad, out=update)
+        opt -= update
+    return opt
+
+
+def StochasticAdam(f, initial_guess, batches, lr = 0.1, beta1 = 0.9, beta2 = 0.999, eps = 1e-8, epochs = 1, precision = "double"):
+    """
+    StochasticAdam is the mini-batch version of Adam, to minimize the mean of a loss over a dataset
+    f: the loss (an adfunction of (params, batch) returning the loss of every row of the batch, see adstruc.loss_and_grad)
+    initial_guess: (int, float, list, np.ndarray) to start the optimization with
+    batches: iterable of mini-batches (e.g. MiniBatches or a generator of chunks of a memory-mapped file), iterated
+    over once per epoch, so that a single mini-batch is in memory at a time
+    lr: learning rate, the size of the first steps
+    beta1, beta2: decay rates of the first and second moment estimates
+    eps: added to the root of the second moment to divide the steps by
+    epochs: number of passes over the mini-batches
+    precision: dtypes of the values and tangents of the gradients, "double", "single" or "mixed" (see adstruc.loss_and_grad),
+    the parameters and the optimizer state staying float64
+    Returns the parameters after the last mini-batch as a float64 array
+    """
+    assert isinstance(initial_guess, (int, float, list, np.ndarray))
+
+    opt = np.array(initial_guess, dtype=float)
+    m = np.zeros_like(opt)
+    v = np.zeros_like(opt)
+    step = np.empty_like(opt)
+    scale = np.empty_like(opt)
+
+    #One step per mini-batch, on the gradient of the mean loss over its rows
+    for t, batch in enumerate(_epochs(batches, epochs), start=1):
+        _, _grad = f.loss_and_grad(_point(opt), batch, precision)
+        _adam_step(opt, _grad, m, v, t, lr, beta1, beta2, eps, step, scale)
+    return opt
+
+
+
+def _zoom_step(a_lo, a_hi, phi_lo, phi_hi, dphi_lo, dphi_hi):
+    """
+    Returns a trial step between a_lo and a_hi, the minimizer of the cubic interpolating phi and its derivative
+    at both ends, or the midpoint when the cubic has no minimizer well inside the interval
+    """
+    d1 = dphi_lo + dphi_hi - 3 * (phi_lo - phi_hi) / (a_lo - a_hi)
+    radicand = d1**2 - dphi_lo * dphi_hi
+    if radicand >= 0:
+        d2 = np.copysign(np.sqrt(radicand), a_hi - a_lo)
+        a = a_hi - (a_hi - a_lo) * (dphi_hi + d2 - d1) / (dphi_hi - dphi_lo + 2 * d2)
+        lo, hi = min(a_lo, a_hi), max(a_lo, a_hi)
+        #Keep away from the ends so that the interval shrinks
+        margin = 0.1 * (hi - lo)
+        if lo + margin <= a <= hi - margin:
+            return a
+    return (a_lo + a_hi) / 2
+
+
+def _line_search(evaluate, value, slope, c1 = 1e-4, c2 = 0.9, max_iter = 20):
+    """
+    Finds a step along a descent direction satisfying the strong Wolfe conditions
+    phi(a) <= phi(0) + c1 a phi'(0) and |phi'(a)| <= c2 |phi'(0)|, with phi(a) = f(x + a d)
+    (Nocedal & Wright, Numerical Optimization, algorithms 3.5 and 3.6)
+    evaluate: function of the step a returning phi(a), phi'(a) and the gradient of f at x + a d, with a single
+    evaluation of f and its gradient
+    value, slope: phi(0) and phi'(0) < 0
+    c1, c2: constants of the sufficient decrease and curvature conditions, 0 < c1 < c2 < 1
+    max_iter: maximum number of evaluations
+    Returns the step, phi and the gradient at the step, or None if no step was found
+    """
+    a_prev, phi_prev, dphi_prev = 0.0, value, slope
+    a = 1.0
+    for i in range(max_iter):
+        phi, dphi, _grad = evaluate(a)
+        if phi > value + c1 * a * slope or (i > 0 and phi >= phi_prev):
+            a_lo, phi_lo, dphi_lo, a_hi, phi_hi, dphi_hi = a_prev, phi_prev, dphi_prev, a, phi, dphi
+            break
+        if abs(dphi) <= -c2 * slope:
+            return a, phi, _grad
+        if dphi >= 0:
+            a_lo, phi_lo, dphi_lo, a_hi, phi_hi, dphi_hi = a, phi, dphi, a_prev, phi_prev, dphi_prev
+            break
+        a_prev, phi_prev, dphi_prev = a, phi, dphi
+        a *= 2
+    else:
+        return None
+
+    #Zoom: [a_lo, a_hi] contains a step satisfying the strong Wolfe conditions, and a_lo satisfies the
+    #sufficient decrease condition with the lowest value found so far
+    for _ in range(max_iter - i - 1):
+        a = _zoom_step(a_lo, a_hi, phi_lo, phi_hi, dphi_lo, dphi_hi)
+        phi, dphi, _grad = evaluate(a)
+        if phi > value + c1 * a * slope or phi >= phi_lo:
+            a_hi, phi_hi, dphi_hi = a, phi, dphi
+        else:
+            if abs(dphi) <= -c2 * slope:
+                return a, phi, _grad
+            if dphi * (a_hi - a_lo) >= 0:
+                a_hi, phi_hi, dphi_hi = a_lo, phi_lo, dphi_lo
+            a_lo, phi_lo, dphi_lo = a, phi, dphi
+    return None
+
+
+def LBFGS(f, initial_guess, history = 10, max_iter = 1000, epsilon = 1e-7):
+    """
+    LBFGS is a limited-memory quasi-Newton algorithm to minimize a function: the direction of each step is the
+    gradient multiplied by an approximation of the inverse Hessian built from the last curvature pairs
+    (s = change of x, y = change of the gradient), and its length is found by a strong Wolfe line search
+    f: the function to optimize (f must have values in a space of dimension = 1)
+    initial_guess: (int, float, list, np.ndarray) to start the optimization with
+    history: maximum number of curvature pairs kept
+    max_iter: maximum number of iteration
+    epsilon: stopping condition on the norm of the gradient
+    Returns an OptimizeResult, holding the minimizer as a float64 array
+    """
+    assert isinstance(initial_guess, (int, float, list, np.ndarray))
+
+    n_evals = 0
+    def value_and_grad(x):
+        nonlocal n_evals
+        n_evals += 1
+        value, _grad = f.value_and_grad(_point(x))
+        return value, np.asarray(_grad, dtype=float).reshape(x.shape)
+
+    opt = np.array(initial_guess, dtype=float)
+    value, _grad = value_and_grad(opt)
+    #Check that the output dimension is 1
+    if not isinstance(value, (int, float)):
+        raise ValueError("For optimization, function output should be int or float. Consider optimizing the  norm of the function.")
+
+    pairs = deque(maxlen=history)
+    t = 0
+    _grad_norm = np.linalg.norm(_grad)
+    while _grad_norm >= epsilon and t < max_iter:
+        t += 1
+        #Two-loop recursion: direction = - H grad
+        direction = -_grad
+        alphas = []
+        for s, y, rho in reversed(pairs):
+            alpha = rho * np.vdot(s, direction)
+            direction = direction - alpha * y
+            alphas.append(alpha)
+        if pairs:
+            s, y, _ = pairs[-1]
+            direction = direction * (np.vdot(s, y) / np.vdot(y, y))
+        else:
+            #Scale the first step so that it has length at most 1
+            direction = direction / max(1.0, _grad_norm)
+        for (s, y, rho), alpha in zip(pairs, reversed(alphas)):
+            beta = rho * np.vdot(y, direction)
+            direction = direction + (alpha - beta) * s
+
+        slope = np.vdot(_grad, direction)
+        if slope >= 0:
+            #Not a descent direction (the approximation lost positive definiteness): restart from the gradient
+            pairs.clear()
+            direction = -_grad / max(1.0, _grad_norm)
+            slope = np.vdot(_grad, direction)
+
+        def evaluate(a):
+            value, _grad = value_and_grad(opt + a * direction)
+            return value, np.vdot(_grad, direction), _grad
+
+        step = _line_search(evaluate, value, slope)
+        if step is None:
+            break
+        a, value, new_grad = step
+        s = a * direction
+        y = new_grad - _grad
+        opt += s
+        _grad = new_grad
+        _grad_norm = np.linalg.norm(_grad)
+        #Only keep pairs of positive curvature, so that the inverse Hessian approximation stays positive definite
+        curvature = np.vdot(s, y)
+        if curvature > 1e-10:
+            pairs.append((s, y, 1 / curvature))
+
+    return OptimizeResult(opt, value, float(_grad_norm), t, n_evals, n_evals, bool(_grad_norm < epsilon))
+
+
+
+def _run(optimizer, f, index, start, kwargs):
+    """
+    Runs the optimizer from one starting point of multistart (in a worker process)
+    Returns the Run, holding the error raised by the optimizer if any (e.g. the RuntimeWarning of GD when it did
+    not converge)
+    """
+    try:
+        result = optimizer(f, start, **kwargs)
+    except Exception as e:
+        return Run(index, start, None, None, None, e)
+    if isinstance(result, OptimizeResult):
+        return Run(index, start, result.x, result.value, result, None)
+    return Run(index, start, result, f(_point(result)), result, None)
+
+
+def multistart(optimizer, f, starts, workers = None, target = None, **kwargs):
+    """
+    multistart runs an optimizer from many starting points in parallel over a process pool, to look for the global
+    minimum of a non-convex function
+    optimizer: the optimizer to run (GD, Adam, LBFGS or any function of (f, initial_guess, **kwargs))
+    f: the function to optimize, which must be picklable (e.g. an adfunction defined at the top level of a module)
+    starts: iterable of initial guesses
+    workers: number of worker processes (None for the number of processors, 1 to run in the current process)
+    target: stop as soon as a run reaches a value lower than or equal to target, cancelling the runs not started yet
+    kwargs: parameters of the optimizer (lr, max_iter, ...)
+    Returns a MultistartResult, with the best run and the runs that completed (a run whose optimizer raised holds
+    the error and is never the best)
+    Raises TypeError if the optimizer does not accept kwargs, before any run
+    """
+    starts = list(starts)
+    runs = []
 
+    #Check the parameters once here, rather than as an error held by every run
+    try:
+        signature = inspect.signature(optimizer)
+    except (TypeError, ValueError):
+        signature = None
+    if signature is not None:
+        signature.bind(f, None, **kwargs)
 
+    def reached(run):
+        return target is not None and run.error is None and run.value <= target
 
+    if workers == 1:
+        for index, start in enumerate(starts):
+            runs.append(_run(optimizer, f, index, start, kwargs))
+            if reached(runs[-1]):
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run, optimizer, f, index, start, kwargs) for index, start in enumerate(starts)]
+            for future in as_completed(futures):
+                runs.append(future.result())
+                if reached(runs[-1]):
+                    #The runs already started finish and are collected below
+                    for other in futures:
+                        other.cancel()
+                    break
+        collected = {run.index for run in runs}
+        for future in futures:
+            if not future.cancelled():
+                run = future.result()
+                if run.index not in collected:
+                    runs.append(run)
+        runs.sort(key=lambda run: run.index)
 
+    completed = [run for run in runs if run.error is None]
+    best = min(completed, key=lambda run: run.value) if completed else None
+    return MultistartResult(best, runs, any(reached(run) for run in runs))
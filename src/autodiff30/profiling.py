@@ -0,0 +1,140 @@
+#!/usr/env/bin python3
+from functools import wraps
+from time import perf_counter
+import autodiff30
+from . import ad
+from . import functions as adf
+from .dual import DualNumber
+
+
+# The operators of DualNumber that are timed (the in-place operators go through them)
+OPERATORS = (
+    "__add__", "__sub__", "__mul__", "__truediv__", "__pow__", "__neg__",
+    "__radd__", "__rsub__", "__rmul__", "__rtruediv__", "__rpow__",
+)
+
+# The elementaries of functions.py that are timed
+ELEMENTARIES = (
+    "sin", "cos", "tan", "arcsin", "arccos", "arctan", "exp", "log", "sqrt", "logistic", "sinh", "cosh", "tanh",
+    "sincos", "sinhcosh",
+)
+
+# The helpers of adstruc that are timed, by the name they are reported under
+HELPERS = {
+    "_seed": "seeding",
+    "_select_part": "jacobian assembly",
+    "_select_tangents": "jacobian assembly",
+}
+
+
+class Profile:
+    """Context manager counting the calls and measuring the time spent in each DualNumber operator, each
+    elementary of functions.py, and the seeding of the inputs and assembly of the Jacobians in adstruc.
+
+    Instrumentation replaces these functions with timed wrappers on entering the context, and puts the
+    originals back on exit, so code run outside a profile pays nothing for it. Elementaries are replaced in
+    functions.py and the autodiff30 package, so they are timed when called through either module (not when
+    imported by name before entering the context). The wrappers are not thread-safe.
+
+    The time of an entry includes the entries it calls (e.g. the operators used by an elementary), while its
+    self time excludes them, so the self times add up to the total time spent in instrumented code.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.times = {}
+        self.self_times = {}
+        self._stack = []
+        self._originals = []
+
+    def _timed(self, name, f):
+        """Returns f wrapped to record its calls under name
+
+        :param name: The name of the entry
+        :type name: str
+        :param f: The function to time
+        :type f: Callable
+        :return: The timed function
+        :rtype: Callable
+        """
+        calls, times, self_times, stack = self.calls, self.times, self.self_times, self._stack
+
+        @wraps(f)
+        def timed(*args, **kwargs):
+            # the stack accumulates the time spent in the entries called by each running entry
+            stack.append(0.0)
+            start = perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                calls[name] = calls.get(name, 0) + 1
+                times[name] = times.get(name, 0.0) + elapsed
+                self_times[name] = self_times.get(name, 0.0) + elapsed - children
+
+        return timed
+
+    def _replace(self, owner, attribute, replacement):
+        """Sets an attribute of a class or module, remembering its original value"""
+        self._originals.append((owner, attribute, getattr(owner, attribute)))
+        setattr(owner, attribute, replacement)
+
+    def __enter__(self):
+        if self._originals:
+            raise RuntimeError("The profile is already active")
+        for attribute in OPERATORS:
+            self._replace(DualNumber, attribute, self._timed(f"DualNumber.{attribute}", getattr(DualNumber, attribute)))
+        for attribute in ELEMENTARIES:
+            original = getattr(adf, attribute)
+            timed = self._timed(attribute, original)
+            for module in (adf, autodiff30):
+                if getattr(module, attribute, None) is original:
+                    self._replace(module, attribute, timed)
+        for attribute, name in HELPERS.items():
+            self._replace(ad, attribute, self._timed(name, getattr(ad, attribute)))
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._originals:
+            owner, attribute, original = self._originals.pop()
+            setattr(owner, attribute, original)
+        self._stack.clear()
+        return False
+
+    @property
+    def total_time(self):
+        """The total time spent in instrumented code, in seconds"""
+        return sum(self.self_times.values())
+
+    def report(self, sort="self_time"):
+        """Formats the statistics as a table, one entry per line
+
+        :param sort: The column to sort by, in decreasing order: "calls", "time" or "self_time", defaults to
+            "self_time"
+        :type sort: str, optional
+        :return: The table
+        :rtype: str
+        """
+        columns = {"calls": self.calls, "time": self.times, "self_time": self.self_times}
+        names = sorted(self.calls, key=lambda name: columns[sort][name], reverse=True)
+        lines = [f"{'entry':<26}{'calls':>10}{'time (s)':>12}{'self (s)':>12}{'per call (us)':>15}"]
+        for name in names:
+            calls, time, self_time = self.calls[name], self.times[name], self.self_times[name]
+            lines.append(f"{name:<26}{calls:>10}{time:>12.6f}{self_time:>12.6f}{self_time / calls * 1e6:>15.2f}")
+        lines.append(f"{'total':<26}{sum(self.calls.values()):>10}{'':>12}{self.total_time:>12.6f}")
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+def profile():
+    """Creates a profile, to use as ``with autodiff30.profile() as p: ...`` and then ``print(p)``
+
+    :return: The profile, which records while its context is active
+    :rtype: Profile
+    """
+    return Profile()
@@ -0,0 +1,403 @@
+#!/usr/env/bin python3
+import math
+import operator
+from .dual import DualNumber
+
+
+class Tape:
+    """Records the nodes of a reverse mode computational graph in the order they are created,
+    which is a topological order of the graph
+    """
+
+    def __init__(self):
+        self.nodes = []
+        # checkpointed segments, by the index of their first output node: the outputs of a segment are
+        # consecutive, so the backward sweep reaches it once the adjoints of all of them are complete, even
+        # when only some of them are differentiated
+        self.segments = {}
+
+    def variable(self, value):
+        """Creates an input node of the graph
+
+        :param value: The value of the input
+        :type value: Union[int, float]
+        :return: A node without parents
+        :rtype: Node
+        """
+        return Node(value, self)
+
+    def gradient(self, output, inputs, seed=1.0):
+        """Computes the derivatives of output with respect to inputs with one backward sweep
+
+        :param output: The node (or constant) to differentiate
+        :type output: Union[Node, int, float]
+        :param inputs: The input nodes
+        :type inputs: List[Node]
+        :param seed: The adjoint of the output, defaults to 1.0
+        :type seed: Union[int, float], optional
+        :return: The adjoint of every input
+        :rtype: List[float]
+        """
+        return self.backward([output], [seed], inputs)
+
+    def backward(self, outputs, seeds, inputs):
+        """Propagates the adjoints of several outputs back to the inputs with one backward sweep,
+        giving the vector-Jacobian product of the seeds with the Jacobian of the outputs
+
+        :param outputs: The nodes (or constants) to differentiate
+        :type outputs: List[Union[Node, int, float]]
+        :param seeds: The adjoint of each output
+        :type seeds: List[Union[int, float]]
+        :param inputs: The input nodes
+        :type inputs: List[Node]
+        :return: The adjoint of every input
+        :rtype: List[float]
+        """
+        adjoints = [0.0] * len(self.nodes)
+        last = -1
+        for output, seed in zip(outputs, seeds):
+            # constant outputs do not depend on the inputs
+            if isinstance(output, Node):
+                adjoints[output.index] += seed
+                last = max(last, output.index)
+        segments = self.segments
+        for node in reversed(self.nodes[: last + 1]):
+            if segments and node.index in segments:
+                segments[node.index].backward(adjoints)
+            adjoint = adjoints[node.index]
+            for parent, partial in zip(node.parents, node.partials):
+                adjoints[parent.index] += adjoint * partial
+        return [adjoints[node.index] for node in inputs]
+
+
+def _apply(op, *args, **kwargs):
+    """Records op applied to args on the tape of the nodes in args. The value and the local
+    partial derivatives are obtained by evaluating the dual number implementation of op once
+    per node argument, seeding that argument with a unit dual part.
+
+    :param op: An operation on dual numbers (an operator or an elementary of functions.py)
+    :type op: Callable
+    :return: The node holding the result
+    :rtype: Node
+    """
+    positions = [i for i, arg in enumerate(args) if isinstance(arg, Node)]
+    tape = args[positions[0]].tape
+    partials = []
+    for i in positions:
+        duals = [
+            DualNumber(arg.value, 1.0 if j == i else 0.0) if isinstance(arg, Node) else arg
+            for j, arg in enumerate(args)
+        ]
+        res = op(*duals, **kwargs)
+        partials.append(res.dual)
+    return Node(res.real, tape, [args[i] for i in positions], partials, op, args, kwargs)
+
+
+def _value(x):
+    """Returns the value of a node, or x itself for a scalar"""
+    return x.value if isinstance(x, Node) else x
+
+
+class _Segment:
+    """Steps of a checkpointed loop recorded on a tape as a single composite operation: only its input
+    and output states are kept, and the steps are recomputed on a temporary tape during the backward
+    sweep to propagate the adjoints of the outputs to the inputs
+
+    :param step: The step, from a list of numbers to a list of numbers
+    :type step: Callable[[List], List]
+    :param inputs: The input state, nodes and constants
+    :type inputs: List[Union[Node, int, float]]
+    :param steps: The number of steps of the segment
+    :type steps: int
+    :param outputs: The output nodes of the segment, created consecutively on the tape
+    :type outputs: List[Node]
+    """
+
+    def __init__(self, step, inputs, steps, outputs):
+        self.step = step
+        self.inputs = inputs
+        self.steps = steps
+        self.outputs = outputs
+
+    def backward(self, adjoints):
+        """Adds the contributions of the adjoints of the outputs to the adjoints of the inputs
+
+        :param adjoints: The adjoints of the nodes of the tape, indexed like the nodes
+        :type adjoints: List[float]
+        """
+        tape = Tape()
+        inputs = [tape.variable(_value(x)) for x in self.inputs]
+        state = inputs
+        for _ in range(self.steps):
+            state = self.step(state)
+        seeds = [adjoints[y.index] for y in self.outputs]
+        for x, adjoint in zip(self.inputs, tape.backward(state, seeds, inputs)):
+            if isinstance(x, Node):
+                adjoints[x.index] += adjoint
+
+
+def checkpoint(step, state, steps, segments=None):
+    """Applies step to state steps times, state = step(state), e.g. to integrate an ODE. On reverse mode
+    nodes, the loop is split into segments of which only the boundary states are kept on the tape, and
+    each segment is recomputed during the backward sweep: the memory grows with segments + steps / segments
+    (the square root of steps by default) instead of steps, for about one more evaluation of the loop.
+    On any other number type the loop is simply run.
+
+    Step must depend on the inputs of the function only through its state: parameters of the loop should
+    be part of the state, and returned unchanged.
+
+    :param step: The step, from a state to the next one, each a number or a list of numbers
+    :type step: Callable
+    :param state: The initial state
+    :type state: Union[Node, DualNumber, int, float, List]
+    :param steps: The number of steps
+    :type steps: int
+    :param segments: The number of segments on reverse mode nodes, defaults to the square root of steps
+    :type segments: int, optional
+    :raises ValueError: If step uses nodes that are not in its state
+    :return: The final state
+    :rtype: Union[Node, DualNumber, int, float, List]
+    """
+    scalar = not isinstance(state, list)
+    states = [state] if scalar else list(state)
+    nodes = [x for x in states if isinstance(x, Node)]
+    if not nodes or steps == 0:
+        for _ in range(steps):
+            state = step(state)
+        return state
+
+    wrapped = (lambda s: [step(s[0])]) if scalar else step
+    tape = nodes[0].tape
+    segments = segments or max(1, int(math.sqrt(steps)))
+    length = -(-steps // segments)
+    for start in range(0, steps, length):
+        n = min(length, steps - start)
+        # the values of the segment are computed on dual numbers without tangents, not recorded
+        values = [DualNumber(_value(x), 0.0) for x in states]
+        for _ in range(n):
+            values = wrapped(values)
+        if any(isinstance(y, Node) for y in values):
+            raise ValueError("The checkpointed step uses nodes that are not in its state")
+        outputs = [Node(y.real if isinstance(y, DualNumber) else y, tape) for y in values]
+        tape.segments[outputs[0].index] = _Segment(wrapped, states, n, outputs)
+        states = outputs
+    return states[0] if scalar else states
+
+
+class Node:
+    """Node of a reverse mode computational graph. Operations on nodes compute their value and
+    record the local partial derivatives with respect to their parents on the tape, so that a
+    single backward sweep gives the gradient of a scalar output with respect to all inputs.
+
+    :param value: The value of the node
+    :type value: Union[int, float]
+    :param tape: The tape the node is recorded on
+    :type tape: Tape
+    :param parents: The nodes this node was computed from, defaults to no parents
+    :type parents: List[Node], optional
+    :param partials: The derivatives of this node with respect to each parent
+    :type partials: List[float], optional
+    :param op: The operation that computed the node, None for an input
+    :type op: Callable, optional
+    :param args: The arguments (nodes and constants) op was applied to
+    :type args: tuple, optional
+    :param kwargs: The keyword arguments op was applied with
+    :type kwargs: dict, optional
+    """
+
+    def __init__(self, value, tape, parents=(), partials=(), op=None, args=(), kwargs=None):
+        self.value = value
+        self.tape = tape
+        self.parents = parents
+        self.partials = partials
+        self.op = op
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.index = len(tape.nodes)
+        tape.nodes.append(self)
+
+    def _elementary(self, f, *args, **kwargs):
+        """Applies an elementary function of functions.py to the node
+
+        :param f: The elementary, which can be evaluated on dual numbers
+        :type f: Callable[[DualNumber], DualNumber]
+        :return: The node f(self)
+        :rtype: Node
+        """
+        return _apply(f, self, *args, **kwargs)
+
+    def __add__(self, other):
+        """Implements the addition of nodes
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: The sum of self with other
+        :rtype: Node
+        """
+        return _apply(operator.add, self, other)
+
+    def __sub__(self, other):
+        """Implements the subtraction of nodes
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: The difference of self with other
+        :rtype: Node
+        """
+        return _apply(operator.sub, self, other)
+
+    def __mul__(self, other):
+        """Implements the multiplication of nodes
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: The product of self with other
+        :rtype: Node
+        """
+        return _apply(operator.mul, self, other)
+
+    def __truediv__(self, other):
+        """Implements the division of nodes
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: The division of self by other
+        :rtype: Node
+        """
+        return _apply(operator.truediv, self, other)
+
+    def __pow__(self, other):
+        """Implements the power of nodes
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: self to the power of other
+        :rtype: Node
+        """
+        return _apply(operator.pow, self, other)
+
+    def __neg__(self):
+        """Implements unary negation operator for nodes
+
+        :return: Minus self
+        :rtype: Node
+        """
+        return _apply(operator.neg, self)
+
+    def __radd__(self, other):
+        """Implements the right addition of a node with a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The sum of other and self
+        :rtype: Node
+        """
+        return _apply(operator.add, other, self)
+
+    def __rsub__(self, other):
+        """Implements the subtraction of a node from a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The difference of other and self
+        :rtype: Node
+        """
+        return _apply(operator.sub, other, self)
+
+    def __rmul__(self, other):
+        """Implements the right multiplication of a node with a scalar
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The product of other and self
+        :rtype: Node
+        """
+        return _apply(operator.mul, other, self)
+
+    def __rtruediv__(self, other):
+        """Implements the division of a scalar by a node
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: The division of other by self
+        :rtype: Node
+        """
+        return _apply(operator.truediv, other, self)
+
+    def __rpow__(self, other):
+        """Implements the power of a scalar to a node
+
+        :param other: A scalar
+        :type other: Union[int, float]
+        :return: other to the power of self
+        :rtype: Node
+        """
+        return _apply(operator.pow, other, self)
+
+    def __str__(self):
+        """Prints the node
+
+        :return: A string representing the value of the node
+        :rtype: str
+        """
+        return f"Node({self.value})"
+
+    def __eq__(self, other):
+        """Implements the equality of nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the values are equal, else False
+        :rtype: bool
+        """
+        return self.value == _value(other)
+
+    def __ne__(self, other):
+        """Implements the inequality of nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the values are different, else False
+        :rtype: bool
+        """
+        return self.value != _value(other)
+
+    def __ge__(self, other):
+        """Implements greater than or equal to for nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the value of self is greater than or equal to that of other, else False
+        :rtype: bool
+        """
+        return self.value >= _value(other)
+
+    def __le__(self, other):
+        """Implements lower than or equal to for nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the value of self is lower than or equal to that of other, else False
+        :rtype: bool
+        """
+        return self.value <= _value(other)
+
+    def __gt__(self, other):
+        """Implements greater than for nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the value of self is greater than that of other, else False
+        :rtype: bool
+        """
+        return self.value > _value(other)
+
+    def __lt__(self, other):
+        """Implements lower than for nodes, considering the value only
+
+        :param other: A node or scalar
+        :type other: Union[Node, Union[int, float]]
+        :return: True if the value of self is lower than that of other, else False
+        :rtype: bool
+        """
+        return self.value < _value(other)
@@ -0,0 +1,66 @@
+#!/usr/env/bin python3
+import numpy as np
+from .reverse import Node
+
+
+def detect_sparsity(tape, inputs, res):
+    """Finds which inputs each output depends on, by propagating dependency sets along a recorded
+    tape. The sets are stored as Python integers used as bitsets, bit j standing for input j.
+
+    :param tape: The tape f was recorded on
+    :type tape: Tape
+    :param inputs: The input nodes of the tape
+    :type inputs: List[Node]
+    :param res: The output of f
+    :type res: Union[Node, List[Node]]
+    :return: The row and column indices of the structural nonzeros of the Jacobian
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    deps = [0] * len(tape.nodes)
+    for j, node in enumerate(inputs):
+        deps[node.index] = 1 << j
+    for node in tape.nodes:
+        for parent in node.parents:
+            deps[node.index] |= deps[parent.index]
+
+    outputs = res if isinstance(res, list) else [res]
+    rows, cols = [], []
+    for i, y in enumerate(outputs):
+        # constant outputs have an empty row
+        bits = deps[y.index] if isinstance(y, Node) else 0
+        while bits:
+            lowest = bits & -bits
+            rows.append(i)
+            cols.append(lowest.bit_length() - 1)
+            bits ^= lowest
+    return np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+
+def color_columns(rows, cols, n):
+    """Greedily colors the columns of a sparsity pattern so that two columns with a nonzero in the
+    same row never share a color. All the columns of one color can then be seeded together, and
+    each entry of the Jacobian is still recovered from exactly one seeded direction.
+
+    :param rows: The row indices of the nonzeros
+    :type rows: np.ndarray
+    :param cols: The column indices of the nonzeros
+    :type cols: np.ndarray
+    :param n: The number of columns
+    :type n: int
+    :return: The color of each column, numbered from 0
+    :rtype: np.ndarray
+    """
+    rows_of_col = [[] for _ in range(n)]
+    cols_of_row = {}
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        rows_of_col[j].append(i)
+        cols_of_row.setdefault(i, []).append(j)
+
+    colors = np.full(n, -1, dtype=int)
+    for j in range(n):
+        forbidden = {colors[k] for i in rows_of_col[j] for k in cols_of_row[i]}
+        color = 0
+        while color in forbidden:
+            color += 1
+        colors[j] = color
+    return colors
@@ -0,0 +1,265 @@
+#!/usr/env/bin python3
+import math
+import operator
+from collections import namedtuple
+from .dual import DualNumber
+from .reverse import Tape, Node
+
+
+# The number of operations of a program before and after Program.optimize, and of the operations
+# removed by each of its passes
+OptimizeReport = namedtuple("OptimizeReport", ["before", "after", "eliminated", "folded", "simplified", "dead"])
+
+_COMMUTATIVE = (operator.add, operator.mul)
+
+# Operators written as Python expressions in the generated code of a program
+_INFIX = {
+    operator.add: "{} + {}",
+    operator.sub: "{} - {}",
+    operator.mul: "{} * {}",
+    operator.truediv: "{} / {}",
+    operator.pow: "{} ** {}",
+    operator.neg: "-{}",
+}
+
+
+def _is_scalar(value, constant):
+    """Returns True if value is the int or float constant"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == constant
+
+
+def _simplify(op, args, refs):
+    """Simplifies x**0, x**1, x*1, 1*x, x+0, 0+x, x-0 and x/1, where x is the only operand referring to
+    another operation
+
+    :return: ("constant", value) or ("reference", index) for the replacement, or None if op is kept
+    :rtype: Union[Tuple[str, Union[int, float]], None]
+    """
+    if len(refs) != 1:
+        return None
+    i = refs[0]
+    other = args[1 - i] if len(args) == 2 else None
+    if op is operator.pow and i == 0:
+        if _is_scalar(other, 0):
+            return "constant", 1
+        if _is_scalar(other, 1):
+            return "reference", args[0]
+    elif (op is operator.mul and _is_scalar(other, 1)) or (op is operator.add and _is_scalar(other, 0)):
+        return "reference", args[i]
+    elif i == 0 and ((op is operator.sub and _is_scalar(other, 0)) or (op is operator.truediv and _is_scalar(other, 1))):
+        return "reference", args[0]
+    return None
+
+
+def _constant(x, value):
+    """Returns the constant value as a number of the type of x, with zero derivatives"""
+    return x**0 * value
+
+
+def _fold(op, args, positions, kwargs):
+    """Evaluates an operation whose operands are all constants. The operands at positions, which were
+    other operations, are evaluated as dual numbers without tangents as they were during the trace"""
+    args = [DualNumber(arg, 0.0) if i in positions else arg for i, arg in enumerate(args)]
+    res = op(*args, **kwargs)
+    return res.real if isinstance(res, DualNumber) else res
+
+
+class Program:
+    """A function traced once into a flat list of operations, which can then be replayed on any
+    number type of the package (dual numbers for forward mode, nodes for reverse mode, batched dual
+    numbers...) without running the Python code of the function again.
+
+    The trace follows the path taken at the tracing point: branches of the function that depend on
+    the value of its input are frozen, so only functions without such branches should be compiled.
+
+    :param f: A function that can work on dual numbers (or list of dual numbers)
+    :type f: Callable
+    :param x: The point at which to trace f
+    :type x: Union[Union[int, float], List[Union[int, float]]]
+    :raises ValueError: If f contains checkpointed loops, which are not recorded operation by operation
+    """
+
+    def __init__(self, f, x):
+        tape = Tape()
+        self.scalar_input = isinstance(x, (int, float))
+        if self.scalar_input:
+            inputs = [tape.variable(x)]
+            res = f(inputs[0])
+        else:
+            inputs = [tape.variable(elt) for elt in x]
+            res = f(inputs)
+        self.n_inputs = len(inputs)
+        if tape.segments:
+            raise ValueError("Functions with checkpointed loops cannot be compiled")
+
+        # Nodes are numbered in creation order, the inputs first, so the index of a node is also
+        # the position of its value during a replay
+        self.instructions = []
+        for node in tape.nodes[self.n_inputs:]:
+            args = [arg.index if isinstance(arg, Node) else arg for arg in node.args]
+            positions = [i for i, arg in enumerate(node.args) if isinstance(arg, Node)]
+            self.instructions.append((node.op, args, positions, node.kwargs))
+
+        self.list_output = isinstance(res, list)
+        outputs = res if self.list_output else [res]
+        self.outputs = [(y.index, True) if isinstance(y, Node) else (y, False) for y in outputs]
+        # the replay function, generated on first call
+        self._replay = None
+
+    def __len__(self):
+        """Returns the number of recorded operations
+
+        :return: The length of the program
+        :rtype: int
+        """
+        return len(self.instructions)
+
+    def __call__(self, x):
+        """Replays the recorded operations on x
+
+        :param x: A number (or list of numbers) of any type supporting the recorded operations
+        :type x: Union[DualNumber, Node, List[DualNumber], List[Node]]
+        :return: The output of the traced function evaluated on x
+        :rtype: Union[DualNumber, Node, List[DualNumber], List[Node]]
+        """
+        if self._replay is None:
+            self._replay = self._generate()
+        return self._replay(x)
+
+    def _generate(self):
+        """Generates the replay function: the instructions written as straight-line Python code, one
+        assignment per operation, with the operators as Python expressions and the other operations
+        and constants bound by name. A replay then runs the operations only, without interpreting the
+        instruction list. A variable is reused once the value it holds is no longer needed, so that
+        intermediate values are freed as early as during a call of the function itself.
+
+        :return: The function replaying the program on its input
+        :rtype: Callable
+        """
+        namespace = {}
+
+        def bind(value):
+            # finite int and float constants are written as literals, others are bound by name
+            if type(value) in (int, float) and math.isfinite(value):
+                return f"({value!r})"
+            name = f"_{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        # the last instruction reading each value, the outputs being read at the end
+        n = self.n_inputs
+        end = n + len(self.instructions)
+        last_use = list(range(end))
+        for index, (op, args, positions, kwargs) in enumerate(self.instructions, n):
+            for i in positions:
+                last_use[args[i]] = index
+        for ref, is_node in self.outputs:
+            if is_node:
+                last_use[ref] = end
+
+        variables = list(range(n))
+        free = []
+        lines = ["def replay(x):", "    v0 = x" if self.scalar_input else "    " + "".join(f"v{i}, " for i in range(n)) + "= x"]
+        for index, (op, args, positions, kwargs) in enumerate(self.instructions, n):
+            operands = [f"v{variables[arg]}" if i in positions else bind(arg) for i, arg in enumerate(args)]
+            if op in _INFIX and not kwargs:
+                expression = _INFIX[op].format(*operands)
+            else:
+                operands += [f"{key}={bind(value)}" for key, value in kwargs.items()]
+                expression = f"{bind(op)}({', '.join(operands)})"
+            for arg in {args[i] for i in positions}:
+                if last_use[arg] == index:
+                    free.append(variables[arg])
+            variables.append(free.pop() if free else len(variables))
+            lines.append(f"    v{variables[index]} = {expression}")
+        outputs = [f"v{variables[ref]}" if is_node else bind(ref) for ref, is_node in self.outputs]
+        lines.append(f"    return [{', '.join(outputs)}]" if self.list_output else f"    return {outputs[0]}")
+        exec(compile("\n".join(lines), "<program>", "exec"), namespace)
+        return namespace["replay"]
+
+    def optimize(self):
+        """Optimizes the program in place, so that later replays run fewer operations: identical
+        operations on the same operands are computed once (common subexpression elimination), the
+        operations made constant are evaluated (constant folding), x**0, x**1, x*1, x+0, x-0 and x/1
+        are simplified, and the operations the outputs do not depend on are removed
+
+        :return: The number of operations before and after, and removed by each pass
+        :rtype: OptimizeReport
+        """
+        before = len(self.instructions)
+        n = self.n_inputs
+        # the replacement of each value of the original program: ("reference", index in the new
+        # program) or ("constant", value)
+        replacements = [("reference", i) for i in range(n)]
+        instructions, seen = [], {}
+        eliminated = folded = simplified = 0
+        for op, args, positions, kwargs in self.instructions:
+            args = list(args)
+            refs = []
+            for i in positions:
+                kind, args[i] = replacements[args[i]]
+                if kind == "reference":
+                    refs.append(i)
+            if not refs:
+                folded += 1
+                replacements.append(("constant", _fold(op, args, positions, kwargs)))
+                continue
+            replacement = _simplify(op, args, refs)
+            if replacement is not None:
+                simplified += 1
+                replacements.append(replacement)
+                continue
+            if op in _COMMUTATIVE and len(refs) == 2:
+                args.sort()
+            key = (op, tuple((i in refs, type(arg), arg) for i, arg in enumerate(args)), tuple(sorted(kwargs.items())))
+            try:
+                index = seen.get(key)
+            except TypeError:
+                # unhashable constants, e.g. arrays, are not compared
+                key, index = None, None
+            if index is not None:
+                eliminated += 1
+                replacements.append(("reference", index))
+                continue
+            index = n + len(instructions)
+            instructions.append((op, args, refs, kwargs))
+            if key is not None:
+                seen[key] = index
+            replacements.append(("reference", index))
+
+        outputs = []
+        for ref, is_node in self.outputs:
+            if not is_node:
+                outputs.append((ref, False))
+                continue
+            kind, value = replacements[ref]
+            if kind == "constant":
+                # outputs that were computed from the inputs keep the number type of the replay
+                instructions.append((_constant, [0, value], [0], {}))
+                kind, value = "reference", n + len(instructions) - 1
+            outputs.append((value, True))
+
+        # dead code elimination, renumbering the operations that are kept
+        live = [False] * (n + len(instructions))
+        for ref, is_node in outputs:
+            if is_node:
+                live[ref] = True
+        for index in range(n + len(instructions) - 1, n - 1, -1):
+            if live[index]:
+                op, args, positions, kwargs = instructions[index - n]
+                for i in positions:
+                    live[args[i]] = True
+        renumbering = list(range(n))
+        kept = []
+        for index, (op, args, positions, kwargs) in enumerate(instructions, n):
+            if live[index]:
+                for i in positions:
+                    args[i] = renumbering[args[i]]
+                kept.append((op, args, positions, kwargs))
+            renumbering.append(n + len(kept) - 1)
+
+        self.instructions = kept
+        self.outputs = [(renumbering[ref], True) if is_node else (ref, False) for ref, is_node in outputs]
+        self._replay = None
+        after = len(kept)
+        return OptimizeReport(before, after, eliminated, folded, simplified, len(instructions) - after)
@@ -3,6 +3,8 @@ import pytest
 import math
 
 from autodiff30.dual import DualNumber
+import autodiff30.functions as adf
+import numpy as np
 from numpy import log
 
 
@@ -248,3 +250,136 @@ class TestDualNumber:
         assert test_int_mul.dual == test_int_rmul.dual
         assert test_float_mul.real == test_float_rmul.real
         assert test_float_mul.dual == test_float_rmul.dual
+
+    def test_vector_tangent(self):
+        # A vector dual part carries several directional derivatives at once
+        test_dual1 = DualNumber(2.0, np.array([1.0, 0.0]))
+        test_dual2 = DualNumber(3.0, np.array([0.0, 1.0]))
+
+        test_dual_mul = test_dual1 * test_dual2
+        assert test_dual_mul.real == 6.0
+        assert test_dual_mul.dual.tolist() == [3.0, 2.0]
+
+        test_dual_div = test_dual1 / test_dual2
+        assert np.allclose(test_dual_div.dual, [1 / 3, -2 / 9])
+
+        test_dual_pow = test_dual1**test_dual2
+        assert np.allclose(test_dual_pow.dual, [3 * 2.0**2, 8 * log(2)])
+
+        test_dual_sum = 3 * test_dual1 - test_dual2 + 1
+        assert test_dual_sum.real == 4.0
+        assert test_dual_sum.dual.tolist() == [3.0, -1.0]
+
+    def test_slots(self):
+        test_dual = DualNumber(1, 2)
+        assert not hasattr(test_dual, "__dict__")
+        with pytest.raises(AttributeError):
+            test_dual.other = 3
+
+    def test_reflected_scalar_operators(self):
+        test_dual = DualNumber(2.0, 3.0)
+
+        test_rsub = 5 - test_dual
+        assert test_rsub.real == 3.0 and test_rsub.dual == -3.0
+
+        test_rdiv = 4 / test_dual
+        assert test_rdiv.real == 2.0 and test_rdiv.dual == -3.0
+
+        test_rpow = 3**test_dual
+        assert test_rpow.real == 9.0
+        assert math.isclose(test_rpow.dual, 9.0 * 3.0 * log(3))
+
+        with pytest.raises(ZeroDivisionError):
+            1 / DualNumber(0, 1)
+        with pytest.raises(TypeError):
+            "1" - test_dual
+
+    def test_array_constants(self):
+        # a parameter with two seeded directions, combined with a batch of three constants
+        test_dual = DualNumber(2.0, np.array([[1.0], [0.0]]))
+        batch = np.array([1.0, 2.0, 4.0])
+
+        for res in (test_dual * batch, batch * test_dual):
+            assert isinstance(res, DualNumber)
+            assert res.real.tolist() == [2.0, 4.0, 8.0]
+            assert res.dual.tolist() == [[1.0, 2.0, 4.0], [0.0, 0.0, 0.0]]
+
+        res = (batch - test_dual) / batch + 1 / (test_dual + batch)
+        assert np.allclose(res.real, (batch - 2) / batch + 1 / (2 + batch))
+        assert np.allclose(res.dual[0], -1 / batch - 1 / (2 + batch) ** 2)
+        assert np.allclose(res.dual[1], 0)
+
+    def test_numpy_ufuncs(self):
+        test_dual = DualNumber(0.5, 2.0)
+        for ufunc in (np.sin, np.cos, np.tan, np.arcsin, np.arccos, np.arctan, np.exp, np.log, np.sqrt,
+                      np.sinh, np.cosh, np.tanh):
+            res = ufunc(test_dual)
+            expected = getattr(adf, ufunc.__name__)(test_dual)
+            assert isinstance(res, DualNumber)
+            assert res.real == expected.real and res.dual == expected.dual
+
+        # operators with the dual number on either side
+        for res, expected in (
+            (np.add(2.0, test_dual), 2.0 + test_dual),
+            (np.subtract(2.0, test_dual), 2.0 - test_dual),
+            (np.multiply(test_dual, 3.0), test_dual * 3.0),
+            (np.divide(1.0, test_dual), 1.0 / test_dual),
+            (np.power(test_dual, 3), test_dual**3),
+            (np.negative(test_dual), -test_dual),
+        ):
+            assert res.real == expected.real and res.dual == expected.dual
+
+        with pytest.raises(ValueError):
+            np.log(DualNumber(-1.0, 1.0))
+        with pytest.raises(TypeError):
+            np.sin(test_dual, out=np.empty(1))
+
+    def test_numpy_arrays(self):
+        # a vector of 3 values with one direction per element
+        x = DualNumber(np.array([0.1, 0.2, 0.3]), np.eye(3))
+        w = np.arange(3.0)
+
+        res = np.sum(np.tanh(w * x) ** 2)
+        sech2 = 1 / np.cosh(w * x.real) ** 2
+        assert np.isclose(res.real, np.sum(np.tanh(w * x.real) ** 2))
+        assert np.allclose(res.dual, 2 * w * np.tanh(w * x.real) * sech2)
+
+        # a batch of 2x2 matrices with two directions
+        A = DualNumber(np.eye(2), np.array([[[1.0, 0.0], [0.0, 0.0]], [[0.0, 1.0], [0.0, 0.0]]]))
+        res = np.mean(A, axis=0)
+        assert np.allclose(res.real, [0.5, 0.5]) and np.allclose(res.dual, [[0.5, 0], [0, 0.5]])
+        res = np.sum(A, axis=-1)
+        assert np.allclose(res.real, [1, 1]) and np.allclose(res.dual, [[1, 0], [1, 0]])
+
+    def test_numpy_matmul(self):
+        x = DualNumber(np.array([0.1, 0.2, 0.3]), np.eye(3))
+        W = np.arange(6.0).reshape(2, 3)
+
+        res = np.sum(np.tanh(W @ x) ** 2)
+        sech2 = 1 / np.cosh(W @ x.real) ** 2
+        assert np.isclose(res.real, np.sum(np.tanh(W @ x.real) ** 2))
+        assert np.allclose(res.dual, W.T @ (2 * np.tanh(W @ x.real) * sech2))
+
+        for res in (np.dot(x, x), x @ x, np.matmul(x, x)):
+            assert np.isclose(res.real, 0.14) and np.allclose(res.dual, [0.2, 0.4, 0.6])
+        res = np.dot(W, x)
+        assert np.allclose(res.real, W @ x.real) and np.allclose(res.dual, W.T)
+        res = x @ W.T
+        assert np.allclose(res.real, W @ x.real) and np.allclose(res.dual, W.T)
+
+        A = DualNumber(np.eye(2), np.array([[[1.0, 0.0], [0.0, 0.0]], [[0.0, 1.0], [0.0, 0.0]]]))
+        res = A @ A
+        assert np.allclose(res.dual, [[[2, 0], [0, 0]], [[0, 2], [0, 0]]])
+
+    def test_object_arrays(self):
+        a = np.array([DualNumber(0.5, 1.0), DualNumber(1.0, 0.0)], dtype=object)
+        res = np.sin(a) * 2 + np.exp(a)
+        assert res.dtype == object
+        assert math.isclose(res[0].real, 2 * math.sin(0.5) + math.exp(0.5))
+        assert math.isclose(res[0].dual, 2 * math.cos(0.5) + math.exp(0.5))
+        assert res[1].dual == 0.0
+        total = np.sum(res)
+        assert isinstance(total, DualNumber) and total.dual == res[0].dual
+
+        res = DualNumber(2.0, 1.0) * a
+        assert res.dtype == object and res[0].real == 1.0 and res[0].dual == 2.5
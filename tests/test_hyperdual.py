@@ -0,0 +1,100 @@
+#!/usr/env/bin python3
+import pytest
+import math
+import numpy as np
+
+from autodiff30.ad import adstruc, adfunction
+from autodiff30.hyperdual import HyperDualNumber
+import autodiff30.functions as adf
+
+
+def second_derivative(f, x, h=1e-4):
+    return (f(x + h) - 2 * f(x) + f(x - h)) / h**2
+
+
+class TestHyperDual:
+
+    elementaries = [
+        (adf.sin, np.sin, 0.3),
+        (adf.cos, np.cos, 0.3),
+        (adf.tan, np.tan, 0.3),
+        (adf.arccos, np.arccos, 0.3),
+        (adf.arcsin, np.arcsin, 0.3),
+        (adf.arctan, np.arctan, 0.3),
+        (adf.exp, np.exp, 0.3),
+        (adf.log, np.log, 0.3),
+        (adf.sqrt, np.sqrt, 0.3),
+        (adf.logistic, lambda x: 1 / (1 + np.exp(-x)), 0.3),
+        (adf.sinh, np.sinh, 0.3),
+        (adf.cosh, np.cosh, 0.3),
+        (adf.tanh, np.tanh, 0.3),
+    ]
+
+    def test_elementaries(self):
+        for f, f_real, x in self.elementaries:
+            res = f(HyperDualNumber(x, 1, 1, 0))
+            assert math.isclose(res.real, f_real(x))
+            assert math.isclose(res.eps12, second_derivative(f_real, x), rel_tol=1e-5)
+
+        res = adf.log(HyperDualNumber(2.0, 1, 1, 0), base=10)
+        assert math.isclose(res.eps12, -1 / (4 * np.log(10)))
+        with pytest.raises(ValueError):
+            adf.sqrt(HyperDualNumber(-1.0, 1, 1, 0))
+
+    def test_operators(self):
+        x = HyperDualNumber(1.5, 1, 1, 0)
+        cases = [
+            (lambda x: x * x * x, lambda x: 6 * x),
+            (lambda x: 1 / x, lambda x: 2 / x**3),
+            (lambda x: x / (x + 1), lambda x: -2 / (x + 1) ** 3),
+            (lambda x: x**2.5, lambda x: 2.5 * 1.5 * x**0.5),
+            (lambda x: 2**x, lambda x: 2**x * np.log(2) ** 2),
+            (lambda x: x**x, lambda x: x**x * ((np.log(x) + 1) ** 2 + 1 / x)),
+            (lambda x: 3 - x * 2 + (-x), lambda x: 0),
+        ]
+        for f, f2 in cases:
+            assert math.isclose(f(x).eps12, f2(1.5), abs_tol=1e-12)
+        with pytest.raises(ZeroDivisionError):
+            1 / HyperDualNumber(0, 1, 1, 0)
+
+    def test_hessian(self):
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return x[0] ** 2 * x[1] + adf.sin(x[1]) * adf.exp(x[2]) + x[2]
+
+        x = [1.0, 2.0, 0.5]
+        H = np.array(foo.hessian(x))
+        expected = np.array(
+            [
+                [2 * x[1], 2 * x[0], 0],
+                [2 * x[0], -np.sin(x[1]) * np.exp(x[2]), np.cos(x[1]) * np.exp(x[2])],
+                [0, np.cos(x[1]) * np.exp(x[2]), np.sin(x[1]) * np.exp(x[2])],
+            ]
+        )
+        assert np.allclose(H, expected)
+        assert len(calls) == 1
+
+        v = [1.0, -2.0, 0.5]
+        assert np.allclose(foo.hvp(x, v), expected @ v)
+
+        @adfunction
+        def foo(x):
+            return [x[0] * x[1], x[0] + x[1]]
+
+        assert foo.hessian([1.0, 2.0]) == [[[0, 1], [1, 0]], [[0, 0], [0, 0]]]
+
+        @adfunction
+        def foo(x):
+            return adf.log(x) * x
+
+        assert math.isclose(foo.hessian(2.0), 0.5)
+        assert math.isclose(foo.hvp(2.0, 3.0), 1.5)
+
+        @adfunction
+        def foo(x):
+            return x[0] ** 1 * x[1]
+
+        assert np.allclose(foo.hessian([0.0, 2.0]), [[0, 1], [1, 0]])
@@ -0,0 +1,136 @@
+#!/usr/env/bin python3
+import pytest
+import numpy as np
+
+from autodiff30.ad import adfunction
+from autodiff30.dual import DualNumber
+from autodiff30 import linalg
+
+
+rng = np.random.default_rng(0)
+A = rng.normal(size=(6, 4))
+b = rng.normal(size=6)
+M = rng.normal(size=(4, 4)) + 4 * np.eye(4)
+
+
+def numerical_jacobian(f, x, h=1e-6):
+    """Central differences Jacobian of f at x, one column per input"""
+    columns = [(f(x + h * e) - f(x - h * e)) / (2 * h) for e in np.eye(len(x))]
+    return np.stack(columns, axis=-1)
+
+
+class TestLinalg:
+    def test_pack(self):
+        x = [DualNumber(1.0, np.array([1.0, 0.0])), 2.0, DualNumber(3.0, np.array([0.0, 1.0]))]
+        packed = linalg.pack(x)
+        assert packed.real.tolist() == [1.0, 2.0, 3.0]
+        assert packed.dual.tolist() == [[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]
+        assert [(y.real, y.dual.tolist()) for y in linalg.unpack(packed)] == [
+            (1.0, [1.0, 0.0]), (2.0, [0.0, 0.0]), (3.0, [0.0, 1.0])
+        ]
+
+        packed = linalg.pack([[x[0], 0.0], [0.0, x[2]]])
+        assert packed.real.shape == (2, 2) and packed.dual.shape == (2, 2, 2)
+        assert packed.dual[1].tolist() == [[0.0, 0.0], [0.0, 1.0]]
+
+        assert linalg.pack(A) is A
+        assert linalg.pack([1, 2]).tolist() == [1.0, 2.0]
+
+    def test_least_squares(self):
+        """A least-squares objective has the gradient 2 A^T (A x - b)"""
+
+        @adfunction
+        def loss(x):
+            return linalg.norm(linalg.matmul(A, x) - b) ** 2
+
+        @adfunction
+        def residuals(x):
+            return linalg.dot(A, x) - b
+
+        x = np.linspace(-1, 1, 4)
+        assert np.isclose(loss(x), np.linalg.norm(A @ x - b) ** 2)
+        assert np.allclose(loss.grad(x), 2 * A.T @ (A @ x - b))
+        assert np.allclose(loss.grad(x.tolist()), 2 * A.T @ (A @ x - b))
+        # vector outputs held by a single dual number
+        assert np.allclose(residuals(x), A @ x - b)
+        assert np.allclose(residuals.grad(x), A)
+        assert isinstance(residuals.grad(x.tolist()), list)
+
+        # a scalar output of inputs holding a batch of points keeps the shape of the batch
+        @adfunction
+        def product(x):
+            return x[0] * x[1]
+
+        batch = [np.array([1.0, 2.0]), 3.0]
+        value, tangent = product(batch), product.jvp(batch, [1.0, 0.0])
+        assert isinstance(value, np.ndarray) and np.array_equal(value, [3.0, 6.0])
+        assert isinstance(tangent, np.ndarray) and np.array_equal(tangent, [3.0, 3.0])
+
+    def test_forward_only(self):
+        """Modes evaluating f on other number types than dual numbers raise a clear TypeError"""
+
+        def loss(x):
+            return linalg.norm(linalg.matmul(A, x) - b) ** 2
+
+        x = np.linspace(-1, 1, 4)
+        calls = [
+            lambda: adfunction(loss, mode="reverse").grad(x),
+            lambda: adfunction(loss, compile=True).grad(x),
+            lambda: adfunction(loss).hessian(x),
+            lambda: adfunction(loss).hvp(x, x),
+            lambda: adfunction(loss).vjp(x, 1.0),
+            lambda: adfunction(lambda x: linalg.dot(A, x) - b).sparse_jacobian(x),
+            lambda: adfunction(lambda t: linalg.norm([t, 1.0])).derivatives(0.5, 3),
+        ]
+        for call in calls:
+            with pytest.raises(TypeError, match="forward mode only"):
+                call()
+
+    def test_matmul(self):
+        @adfunction
+        def foo(x):
+            P = linalg.pack([[x[0], x[1]], [x[2], x[3]]])
+            return np.sum((P @ P) @ np.array([1.0, -1.0]) + np.array([2.0, 1.0]) @ P)
+
+        def g(z):
+            P = z.reshape(2, 2)
+            return np.sum((P @ P) @ np.array([1.0, -1.0]) + np.array([2.0, 1.0]) @ P)
+
+        z = np.array([2.0, 1.0, 0.5, 3.0])
+        assert np.allclose(foo.grad(z), numerical_jacobian(g, z), atol=1e-6)
+
+        with pytest.raises(ValueError):
+            linalg.matmul(DualNumber(np.ones((2, 2, 2)), 1), np.ones(2))
+
+    def test_solve(self):
+        @adfunction
+        def foo(x):
+            return linalg.solve([[M[i, j] * x[0] for j in range(4)] for i in range(4)], x[1:])
+
+        def g(y):
+            return np.linalg.solve(M * y[0], y[1:])
+
+        y = np.array([1.5, 1.0, 2.0, 3.0, 4.0])
+        assert np.allclose(foo(y), g(y))
+        assert np.allclose(foo.grad(y), numerical_jacobian(g, y), atol=1e-6)
+
+        # matrix right-hand sides, through np.linalg.solve
+        X = DualNumber(np.eye(4), np.ones((3, 1, 1)))
+        res = np.linalg.solve(M, X)
+        assert np.allclose(res.real, np.linalg.inv(M))
+        assert np.allclose(res.dual, np.linalg.solve(M, np.ones((4, 4)))[None])
+        assert np.allclose(linalg.solve(M, b[:4]), np.linalg.solve(M, b[:4]))
+
+    def test_norm(self):
+        x = DualNumber(np.array([3.0, 4.0]), np.eye(2))
+        for res in (linalg.norm(x), np.linalg.norm(x), linalg.norm(x, 2)):
+            assert res.real == 5.0 and np.allclose(res.dual, [0.6, 0.8])
+        res = linalg.norm(DualNumber(np.array([[3.0, 0.0], [0.0, 4.0]]), 1), "fro")
+        assert res.real == 5.0 and np.isclose(res.dual, 1.4)
+
+        with pytest.raises(ValueError):
+            linalg.norm(DualNumber(np.zeros(2), np.eye(2)))
+        with pytest.raises(ValueError):
+            linalg.norm(x, 1)
+        with pytest.raises(ValueError):
+            np.linalg.norm(x, axis=0)
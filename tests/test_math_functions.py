@@ -3,6 +3,7 @@ import numpy as np
 import math
 
 from autodiff30.dual import DualNumber
+from autodiff30.hyperdual import HyperDualNumber
 import autodiff30.functions as adf
 
 
@@ -137,3 +138,20 @@ class TestMathFunctions:
             assert math.isclose(res.real, np.tanh(x)) and math.isclose(
                 res.dual, y * (1 / (np.cosh(x) ** 2))
             )
+        # saturated, tanh(20) rounds to 1 but its derivative does not vanish
+        res = adf.tanh(DualNumber(20.0, 1.0))
+        assert res.real == 1.0 and math.isclose(res.dual, 1 / np.cosh(20.0) ** 2)
+
+    def test_sincos(self):
+        for (x, y) in self.values:
+            z = DualNumber(x, y)
+            s, c = adf.sincos(z)
+            assert (s.real, s.dual, c.real, c.dual) == (adf.sin(z).real, adf.sin(z).dual, adf.cos(z).real, adf.cos(z).dual)
+            s, c = adf.sinhcosh(z)
+            assert (s.real, s.dual, c.real, c.dual) == (adf.sinh(z).real, adf.sinh(z).dual, adf.cosh(z).real, adf.cosh(z).dual)
+
+        z = DualNumber(np.linspace(-1, 1, 5), np.ones(5))
+        s, c = adf.sincos(z)
+        assert np.array_equal(s.dual, np.cos(z.real)) and np.array_equal(c.dual, -np.sin(z.real))
+        s, c = adf.sincos(HyperDualNumber(0.3, 1, 1, 0))
+        assert math.isclose(s.eps12, -np.sin(0.3)) and math.isclose(c.eps12, -np.cos(0.3))
@@ -5,8 +5,14 @@ import numpy as np
 from autodiff30.ad import adstruc, adfunction
 import autodiff30.functions as adf
 import autodiff30.optimization as ad_opt
+import pickle
 
 
+# defined at the top level so that it can be sent to worker processes
+@adfunction
+def double_well(x):
+    return x**4 - 3 * x**2 + x
+
 
 class TestOptimize:
 
@@ -132,3 +138,199 @@ class TestOptimize:
             with pytest.raises(RuntimeWarning):
                 ad_opt.Adam(foo, x)
 
+
+    def test_adam_step(self):
+        """One step of Adam against the update computed by hand"""
+
+        @adfunction
+        def foo(x):
+            return x[0]**2 + 3 * x[1] - 0.5 * x[2]**2
+
+        # at [1, -2, 0.5] the gradient is g = [2, 3, -0.5], so m = 0.1 g and v = 0.001 g**2, whose bias
+        # corrections are g and g**2: the step is lr * g / (|g| + eps)
+        g = np.array([2.0, 3.0, -0.5])
+        expected = np.array([1.0, -2.0, 0.5]) - 0.01 * g / (np.abs(g) + 1e-3)
+        for epsilon in (1e-3, 1e-12):
+            # the stopping tolerance does not change the step
+            res = ad_opt.Adam(foo, [1.0, -2.0, 0.5], lr=0.01, max_iter=1, epsilon=epsilon, eps=1e-3)
+            assert np.allclose(res, expected, rtol=1e-12, atol=0)
+
+    def test_single_pass_per_iteration(self):
+        """The optimizers evaluate the function once per iteration, value and gradient together"""
+
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return x[0]**2 + x[1]**2
+
+        ad_opt.GD(foo, [1.0, 1.0], max_iter=5, epsilon=1e10)
+        assert len(calls) == 1
+        calls.clear()
+        ad_opt.Adam(foo, [1.0, 1.0], max_iter=5, epsilon=1e10)
+        assert len(calls) == 1
+
+        @adfunction
+        def foo(x):
+            return [x[0], x[1]]
+
+        with pytest.raises(ValueError):
+            ad_opt.GD(foo, [1.0, 1.0])
+        with pytest.raises(ValueError):
+            ad_opt.Adam(foo, [1.0, 1.0])
+
+    def test_arrays(self):
+        """The optimizers accept and return float64 arrays"""
+
+        @adfunction
+        def foo(x):
+            return (x[0] - 1)**2 + (x[1] + 2)**2
+
+        x0 = np.array([5.0, 5.0])
+        for optimizer in (ad_opt.GD, ad_opt.Adam):
+            res = optimizer(foo, x0)
+            assert isinstance(res, np.ndarray) and res.dtype == np.float64
+            assert np.linalg.norm(res - np.array([1, -2])) < 1e-5
+            # integer starting points are optimized in float64 too
+            assert np.linalg.norm(optimizer(foo, [5, 5]) - np.array([1, -2])) < 1e-5
+        assert np.array_equal(x0, [5.0, 5.0])
+
+    def test_minibatch(self, tmp_path):
+        """The stochastic optimizers fit a linear regression streamed from a memory-mapped file"""
+
+        rng = np.random.default_rng(0)
+        X = rng.uniform(-1, 1, 1000)
+        data = np.stack([X, 3 * X - 2], axis=1)
+        np.save(tmp_path / "data.npy", data)
+        data = np.load(tmp_path / "data.npy", mmap_mode="r")
+
+        @adfunction
+        def loss(p, batch):
+            return (p[0] * batch[:, 0] + p[1] - batch[:, 1]) ** 2
+
+        # mean loss and gradient over a batch
+        value, grad = loss.loss_and_grad(np.array([1.0, 0.0]), data[:10])
+        residuals = data[:10, 0] + 2 - 3 * data[:10, 0]
+        assert math.isclose(value, np.mean(residuals**2))
+        assert np.allclose(grad, [np.mean(2 * residuals * data[:10, 0]), np.mean(2 * residuals)])
+
+        batches = ad_opt.MiniBatches(data, 100)
+        assert len(batches) == 10
+        assert all(isinstance(batch, np.memmap) for batch in batches)
+
+        res = ad_opt.SGD(loss, [0, 0], batches, lr=0.1, epochs=20)
+        assert np.allclose(res, [3, -2], atol=1e-4)
+        res = ad_opt.StochasticAdam(loss, [0, 0], batches, lr=0.05, epochs=30)
+        assert np.allclose(res, [3, -2], atol=1e-2)
+
+        # float32 tangents, the parameters staying float64
+        for precision in ("single", "mixed"):
+            value32, grad32 = loss.loss_and_grad(np.array([1.0, 0.0]), data[:10], precision)
+            assert math.isclose(value32, value, rel_tol=1e-6) and np.allclose(grad32, grad, rtol=1e-6)
+            res = ad_opt.SGD(loss, [0, 0], batches, lr=0.1, epochs=20, precision=precision)
+            assert res.dtype == np.float64 and np.allclose(res, [3, -2], atol=1e-4)
+
+        # a scalar element of the batch, a NumPy float32 in single precision, is a constant
+        @adfunction
+        def scaled(p, batch):
+            return (p[0] * batch[:, 0] + p[1] - batch[:, 1]) ** 2 / batch[0, 0] ** 2
+
+        value32, grad32 = scaled.loss_and_grad(np.array([1.0, 0.0]), data[:10], "single")
+        scale = data[0, 0] ** 2
+        assert math.isclose(value32, value / scale, rel_tol=1e-5) and np.allclose(grad32, grad / scale, rtol=1e-5)
+
+        # a generator is only iterated over once
+        with pytest.raises(ValueError):
+            ad_opt.SGD(loss, [0, 0], iter(batches), epochs=2)
+
+        @adfunction
+        def loss(p, batch):
+            return (p - batch) ** 2
+
+        assert math.isclose(ad_opt.SGD(loss, 0, [np.array([1.0, 3.0])] * 200, lr=0.1), 2)
+
+        # on a single batch, StochasticAdam takes the step of Adam on the mean loss
+        @adfunction
+        def mean_loss(p):
+            return ((p - 1.0) ** 2 + (p - 3.0) ** 2) / 2
+
+        stochastic = ad_opt.StochasticAdam(loss, 0.5, [np.array([1.0, 3.0])])
+        assert np.allclose(stochastic, ad_opt.Adam(mean_loss, 0.5, max_iter=1), rtol=1e-12, atol=0)
+
+    def test_lbfgs(self):
+        """L-BFGS converges on the Rosenbrock function in far fewer evaluations than GD"""
+
+        @adfunction
+        def rosenbrock(x):
+            return 100 * (x[1] - x[0]**2)**2 + (1 - x[0])**2
+
+        res = ad_opt.LBFGS(rosenbrock, [-1.2, 1.0])
+        assert res.converged
+        assert np.allclose(res.x, [1, 1])
+        assert res.grad_norm < 1e-7 and res.value < 1e-12
+        assert res.n_iter < 100 and res.n_fev == res.n_gev < 200
+
+        calls = 0
+
+        @adfunction
+        def foo(x):
+            nonlocal calls
+            calls += 1
+            return (x - 3)**2 + adf.exp(x)
+
+        res = ad_opt.LBFGS(foo, 0)
+        assert res.converged and calls == res.n_fev
+        # 2 (x - 3) + exp(x) = 0
+        assert math.isclose(2 * (res.x - 3) + math.exp(res.x), 0, abs_tol=1e-7)
+
+        # the history is bounded and the iteration count is reported when not converged
+        res = ad_opt.LBFGS(rosenbrock, [-1.2, 1.0], history=3, max_iter=5)
+        assert not res.converged and res.n_iter == 5
+
+        @adfunction
+        def foo(x):
+            return [x[0], x[1]]
+
+        with pytest.raises(ValueError):
+            ad_opt.LBFGS(foo, [1, 2])
+
+    def test_pickle(self):
+        """Decorated functions can be pickled, without their cache"""
+        foo = adfunction(double_well.f, mode="reverse", cache_size=2)
+        foo.grad(1.0)
+        for f in (double_well, foo):
+            copy = pickle.loads(pickle.dumps(f))
+            assert copy.f is double_well.f and copy.mode == f.mode and copy.cache_size == f.cache_size
+            assert copy.cache_info().currsize == 0
+            assert copy.value_and_grad(2.0) == f.value_and_grad(2.0)
+
+    def test_multistart(self):
+        """Runs started in both wells find the global minimum"""
+        starts = [-2.0, -0.5, 0.5, 2.0]
+        for workers in (1, 2):
+            res = ad_opt.multistart(ad_opt.GD, double_well, starts, workers=workers, lr=0.01)
+            assert [run.index for run in res.runs] == [0, 1, 2, 3]
+            assert [run.start for run in res.runs] == starts
+            assert all(run.error is None for run in res.runs)
+            assert math.isclose(res.best.x, -1.3008, abs_tol=1e-3)
+            assert math.isclose(res.best.value, double_well(float(res.best.x)))
+            assert not res.target_reached
+
+        res = ad_opt.multistart(ad_opt.LBFGS, double_well, starts, workers=2)
+        assert isinstance(res.best.result, ad_opt.OptimizeResult)
+        assert res.best.value < -3.5
+
+        # early stop
+        res = ad_opt.multistart(ad_opt.LBFGS, double_well, starts, workers=1, target=-3.5)
+        assert res.target_reached and len(res.runs) == 1
+        res = ad_opt.multistart(ad_opt.LBFGS, double_well, starts * 50, workers=2, target=-3.5)
+        assert res.target_reached and res.best.value <= -3.5
+
+        # runs that did not converge hold their error
+        res = ad_opt.multistart(ad_opt.GD, double_well, [2.0], workers=1, max_iter=2)
+        assert isinstance(res.runs[0].error, RuntimeWarning) and res.best is None
+
+        # parameters the optimizer does not accept are an error of the call, not of the runs
+        with pytest.raises(TypeError):
+            ad_opt.multistart(ad_opt.GD, double_well, starts, workers=2, learning_rate=0.1)
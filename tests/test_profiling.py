@@ -0,0 +1,71 @@
+#!/usr/env/bin python3
+import pytest
+import numpy as np
+
+import autodiff30
+from autodiff30.ad import adfunction
+from autodiff30.dual import DualNumber
+from autodiff30.hyperdual import HyperDualNumber
+import autodiff30.ad as ad
+import autodiff30.functions as adf
+
+
+@adfunction
+def foo(x):
+    return [adf.log(x[0]) * autodiff30.tan(x[1]) ** 2, x[0] / x[1]]
+
+
+class TestProfiling:
+    def test_counts(self):
+        with autodiff30.profile() as p:
+            for _ in range(3):
+                foo.grad(np.array([1.5, 0.3]))
+        assert p.calls == {
+            "seeding": 3,
+            "log": 3,
+            "tan": 3,
+            "DualNumber.__pow__": 3,
+            "DualNumber.__mul__": 3,
+            "DualNumber.__truediv__": 3,
+            "jacobian assembly": 6,
+        }
+        for name in p.calls:
+            assert 0 <= p.self_times[name] <= p.times[name]
+        assert p.total_time == pytest.approx(sum(p.self_times.values()))
+        assert "DualNumber.__pow__" in p.report() and str(p) == p.report()
+
+        # nothing is recorded outside the context
+        foo.grad(np.array([1.5, 0.3]))
+        assert p.calls["seeding"] == 3
+
+    def test_nested_time(self):
+        """The time of an entry includes the entries it calls, its self time does not"""
+        with autodiff30.profile() as p:
+            outer = p._timed("outer", lambda x: adf.sin(x) * adf.exp(x))
+            outer(DualNumber(1.0, 1.0))
+        inner = p.times["sin"] + p.times["exp"] + p.times["DualNumber.__mul__"]
+        assert p.times["outer"] >= inner
+        assert p.self_times["outer"] == pytest.approx(p.times["outer"] - inner)
+
+    def test_reverse(self):
+        """Reverse mode nodes evaluate the dual number operators"""
+        with autodiff30.profile() as p:
+            adfunction(foo.f, mode="reverse").grad([1.5, 0.3])
+        assert p.calls["log"] == p.calls["tan"] == 1
+        # one evaluation per node argument of x[0] / x[1]
+        assert p.calls["DualNumber.__truediv__"] == 2
+
+    def test_restore(self):
+        originals = [DualNumber.__add__, adf.sin, autodiff30.sin, ad._seed, ad._select_tangents]
+        profile = autodiff30.profile()
+        with pytest.raises(ZeroDivisionError):
+            with profile:
+                assert DualNumber.__add__ is not originals[0] and adf.sin is not originals[1]
+                assert autodiff30.sin is adf.sin
+                with pytest.raises(RuntimeError):
+                    profile.__enter__()
+                DualNumber(1.0, 1.0) / DualNumber(0.0, 1.0)
+        assert [DualNumber.__add__, adf.sin, autodiff30.sin, ad._seed, ad._select_tangents] == originals
+        assert profile.calls["DualNumber.__truediv__"] == 1
+        # the instrumented functions keep their identity for the hyper-dual tables
+        assert adf.sin(HyperDualNumber(0.0, 1.0, 1.0)).eps1 == 1.0
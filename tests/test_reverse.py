@@ -0,0 +1,132 @@
+#!/usr/env/bin python3
+import pytest
+import math
+import numpy as np
+
+from autodiff30.ad import adstruc, adfunction
+from autodiff30.reverse import Node, Tape, checkpoint
+import autodiff30.functions as adf
+
+
+class TestReverse:
+
+    xs = [[0.3, 0.7], [-0.5, 0.2], [0.1, 0.9]]
+
+    def test_node(self):
+        tape = Tape()
+        x = tape.variable(2.0)
+        y = tape.variable(3.0)
+        z = x * y + adf.sin(x) / y - 4 ** x + y**2
+        assert math.isclose(z.value, 6 + np.sin(2) / 3 - 16 + 9)
+        dx, dy = tape.gradient(z, [x, y])
+        assert math.isclose(dx, 3 + np.cos(2) / 3 - 16 * np.log(4))
+        assert math.isclose(dy, 2 - np.sin(2) / 9 + 6)
+        assert x < y and x <= 2 and y == 3.0 and y != x and y >= x and y > 2
+        assert len(tape.nodes) == 10
+
+    def test_scalar_output(self):
+        """Reverse mode agrees with forward mode on functions R^n -> R"""
+
+        def foo(x):
+            return (
+                adf.exp(x[0]) * adf.cos(x[1])
+                + adf.log(x[0] ** 2 + 1, base=2)
+                - adf.tanh(x[0] * x[1]) / (1 + adf.logistic(x[1]))
+                + adf.arctan(x[1]) ** x[0] ** 2
+                + adf.sqrt(adf.cosh(x[1]) + adf.sinh(x[0]) ** 2)
+                + adf.arcsin(x[0]) - adf.arccos(x[1]) + adf.tan(x[0] - x[1])
+            )
+
+        forward = adfunction(foo)
+        reverse = adfunction(mode="reverse")(foo)
+        for x in self.xs:
+            assert np.allclose(reverse.grad(x), forward.grad(x))
+            assert reverse(x) == forward(x)
+
+    def test_single_forward_pass(self):
+        calls = []
+
+        @adfunction(mode="reverse")
+        def foo(x):
+            calls.append(1)
+            return sum(x[i] ** 2 for i in range(len(x)))
+
+        x = list(range(50))
+        assert foo.grad(x) == [2 * i for i in x]
+        assert len(calls) == 1
+
+    def test_shapes(self):
+        @adfunction(mode="reverse")
+        def foo(x):
+            return 3 * x
+
+        assert foo.grad(2) == 3
+
+        @adfunction(mode="reverse")
+        def foo(x):
+            return [x, 2 * x, 5]
+
+        assert foo.grad(2) == [1, 2, 0]
+
+        @adfunction(mode="reverse")
+        def foo(x):
+            return [x[0] * x[1], x[0] + x[1]]
+
+        assert foo.grad([2, 3]) == [[3, 2], [1, 1]]
+
+    def test_errors(self):
+        @adfunction(mode="reverse")
+        def foo(x):
+            return adf.log(x)
+
+        with pytest.raises(ValueError):
+            foo.grad(-1)
+
+        with pytest.raises(ValueError):
+            adstruc(lambda x: x, mode="sideways")
+
+    def test_checkpoint(self):
+        def euler(state):
+            # an explicit Euler step of the damped oscillator x'' = -k x - c x', with k and c in the state
+            x, v, k, c = state
+            return [x + 0.01 * v, v - 0.01 * (k * x + c * v) + 0.001 * adf.sin(x), k, c]
+
+        def loop_state(x, checkpointed):
+            state = [x[0], 0.0, x[1], x[2]]
+            if checkpointed:
+                return checkpoint(euler, state, 400)
+            for _ in range(400):
+                state = euler(state)
+            return state
+
+        def loop(x, checkpointed):
+            state = loop_state(x, checkpointed)
+            return state[0] ** 2 + state[1]
+
+        x = [1.0, 2.0, 0.3]
+        forward = adfunction(lambda x: loop(x, False))
+        reverse = adfunction(lambda x: loop(x, True), mode="reverse")
+        assert math.isclose(reverse(x), forward(x))
+        assert np.allclose(reverse.grad(x), forward.grad(x))
+        assert np.allclose(adfunction(lambda x: loop(x, True)).grad(x), forward.grad(x))
+
+        # only the 20 boundary states of 4 numbers are kept on the tape, and each backward recomputation
+        # records a single segment of 20 steps
+        tape = Tape()
+        inputs = [tape.variable(elt) for elt in x]
+        res = loop(inputs, True)
+        assert len(tape.nodes) < 3 + 20 * 4 + 10
+        assert np.allclose(tape.gradient(res, inputs), forward.grad(x))
+
+        assert checkpoint(lambda y: y * 2, tape.variable(1.0), 10, segments=3).value == 1024
+        assert checkpoint(euler, inputs, 0) is inputs
+
+        # each element of the final state returned as it is
+        for k in range(4):
+            forward = adfunction(lambda x: loop_state(x, False)[k])
+            reverse = adfunction(lambda x: loop_state(x, True)[k], mode="reverse")
+            assert np.allclose(reverse.grad(x), forward.grad(x))
+        with pytest.raises(ValueError):
+            checkpoint(lambda y: [inputs[1] * y[0]], [inputs[0]], 10)
+        with pytest.raises(ValueError):
+            adfunction(lambda x: loop(x, True), mode="reverse", compile=True).grad(x)
@@ -0,0 +1,73 @@
+#!/usr/env/bin python3
+import pytest
+import numpy as np
+
+from autodiff30.ad import adstruc, adfunction
+from autodiff30.sparse import detect_sparsity, color_columns
+import autodiff30.functions as adf
+
+
+def residual(x):
+    """Discretized 1-D reaction-diffusion residual, with a tridiagonal Jacobian"""
+    n = len(x)
+    res = []
+    for i in range(n):
+        left = x[i - 1] if i > 0 else 0
+        right = x[i + 1] if i < n - 1 else 0
+        res.append(left - 2 * x[i] + right + adf.exp(x[i]))
+    return res
+
+
+class TestSparse:
+
+    def test_pattern(self):
+        foo = adfunction(residual)
+        tape, inputs, res = foo._record([0.1] * 6)
+        rows, cols = detect_sparsity(tape, inputs, res)
+        assert sorted(zip(rows.tolist(), cols.tolist())) == sorted(
+            (i, j) for i in range(6) for j in range(6) if abs(i - j) <= 1
+        )
+        colors = color_columns(rows, cols, 6)
+        assert colors.max() + 1 == 3
+        for i in range(6):
+            row_colors = colors[cols[rows == i]]
+            assert len(set(row_colors.tolist())) == len(row_colors)
+
+    def test_sparse_jacobian(self):
+        pytest.importorskip("scipy")
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return residual(x)
+
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=200).tolist()
+        J = foo.sparse_jacobian(x)
+        assert J.shape == (200, 200)
+        assert J.nnz == 3 * 200 - 2
+        assert np.allclose(J.toarray(), foo.grad(x))
+        assert max(foo.colorings[200][3]) + 1 == 3
+
+        # the pattern and coloring are reused at other points
+        x = rng.normal(size=200).tolist()
+        calls.clear()
+        assert np.allclose(foo.sparse_jacobian(x).toarray(), foo.grad(x))
+        assert len(calls) == 2
+
+    def test_scalar_and_constant_outputs(self):
+        pytest.importorskip("scipy")
+
+        @adfunction
+        def foo(x):
+            return [x[0] * x[2], 5, adf.sin(x[1])]
+
+        J = foo.sparse_jacobian([1.0, 2.0, 3.0])
+        assert np.allclose(J.toarray(), [[3.0, 0, 1.0], [0, 0, 0], [0, np.cos(2.0), 0]])
+
+        @adfunction
+        def foo(x):
+            return x[0] * x[1]
+
+        assert np.allclose(foo.sparse_jacobian([2.0, 3.0]).toarray(), [[3.0, 2.0]])
@@ -0,0 +1,77 @@
+#!/usr/env/bin python3
+import pytest
+import math
+import numpy as np
+
+from autodiff30.ad import adfunction
+from autodiff30.hyperdual import HyperDualNumber
+from autodiff30.taylor import TaylorNumber
+import autodiff30.functions as adf
+
+
+class TestTaylor:
+
+    elementaries = [
+        adf.sin, adf.cos, adf.tan, adf.arccos, adf.arcsin, adf.arctan, adf.exp, adf.log, adf.sqrt,
+        adf.logistic, adf.sinh, adf.cosh, adf.tanh,
+    ]
+
+    def test_elementaries(self):
+        # the first three derivatives against dual and hyper-dual numbers, and a finite difference of the latter
+        for f in self.elementaries:
+            d = f(TaylorNumber([0.3, 1, 0, 0])).derivatives()
+            h = f(HyperDualNumber(0.3, 1, 1, 0))
+            third = (f(HyperDualNumber(0.3 + 1e-4, 1, 1, 0)).eps12 - f(HyperDualNumber(0.3 - 1e-4, 1, 1, 0)).eps12) / 2e-4
+            assert np.allclose(d[:3], [h.real, h.eps1, h.eps12])
+            assert math.isclose(d[3], third, rel_tol=1e-6)
+
+        d = adf.log(TaylorNumber([2.0, 1, 0]), base=10).derivatives()
+        assert np.allclose(d, [math.log10(2), 1 / (2 * math.log(10)), -1 / (4 * math.log(10))])
+
+        with pytest.raises(ValueError):
+            adf.log(TaylorNumber([-1.0, 1, 0]))
+        with pytest.raises(ValueError):
+            adf.arcsin(TaylorNumber([2.0, 1, 0]))
+        with pytest.raises(ValueError):
+            adf.sqrt(TaylorNumber([0.0, 1, 0]))
+        with pytest.raises(ValueError):
+            adf.tan(TaylorNumber([np.pi / 2, 1, 0]))
+        with pytest.raises(TypeError):
+            adf.log(TaylorNumber([2.0, 1, 0]), base="10")
+
+    def test_high_order(self):
+        f = adfunction(lambda x: adf.exp(2 * x))
+        assert np.allclose(f.derivatives(0.5, order=6), [2**n * math.exp(1) for n in range(7)])
+
+        f = adfunction(adf.sin)
+        cycle = [math.sin(0.4), math.cos(0.4), -math.sin(0.4), -math.cos(0.4)]
+        assert np.allclose(f.derivatives(0.4, order=6), (cycle * 2)[:7])
+
+        f = adfunction(lambda x: adf.log(x))
+        assert np.allclose(f.derivatives(2.0, order=5)[1:], [(-1) ** (n - 1) * math.factorial(n - 1) / 2**n for n in range(1, 6)])
+
+        f = adfunction(lambda x: x**5 - 1 / x)
+        assert np.allclose(f.derivatives(1.0, order=6), [0, 6, 18, 66, 96, 240, -720])
+
+    def test_operations(self):
+        f = adfunction(lambda x: [x**x, 2**x / (1 + x), 3 - x, 2.5])
+        value, d = f(1.5), f.derivatives(1.5, order=4)
+        assert np.allclose([elt[0] for elt in d], value)
+        assert np.allclose(d[0][:3], [1.5**1.5, 1.5**1.5 * (math.log(1.5) + 1), 1.5**1.5 * ((math.log(1.5) + 1) ** 2 + 1 / 1.5)])
+        assert d[2] == [1.5, -1, 0, 0, 0]
+        assert d[3] == [2.5, 0.0, 0.0, 0.0, 0.0]
+
+        f = adfunction(lambda x: adf.sin(x) * adf.exp(x), compile=True)
+        assert np.allclose(f.derivatives(0.0, order=4), [0, 1, 2, 2, 0])
+        assert np.allclose(f.derivatives(1.0, order=2)[2], f.hessian(1.0))
+
+    def test_numpy_scalars(self):
+        x = TaylorNumber([1.5, 1, 0])
+        for c in [np.float32(2), np.float64(2), np.int64(2)]:
+            assert np.allclose((x + c).coefficients, [3.5, 1, 0])
+            assert np.allclose((c - x).coefficients, [0.5, -1, 0])
+            assert np.allclose((x * c).coefficients, [3, 2, 0])
+            assert np.allclose((c / x).coefficients, [2 / 1.5, -2 / 1.5**2, 2 / 1.5**3])
+            assert np.allclose((x**c).coefficients, [2.25, 3, 1])
+            assert np.allclose((c**x).derivatives(), [2**1.5, 2**1.5 * math.log(2), 2**1.5 * math.log(2) ** 2])
+        assert np.allclose((TaylorNumber([0.0, 1, 0]) ** np.int64(2)).coefficients, [0, 0, 1])
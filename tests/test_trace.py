@@ -0,0 +1,124 @@
+#!/usr/env/bin python3
+import pytest
+import numpy as np
+
+from autodiff30.ad import adstruc, adfunction
+from autodiff30.trace import Program
+import autodiff30.functions as adf
+import autodiff30.optimization as ad_opt
+
+
+class TestTrace:
+
+    xs = [[0.3, 0.7, 1.2], [-0.5, 0.2, 2.0], [0.1, 0.9, 0.5]]
+
+    @staticmethod
+    def foo(x):
+        total = 0
+        for i in range(len(x) - 1):
+            total = total + adf.exp(x[i] * x[i + 1]) - adf.log(x[-1], base=10) / (1 + x[i] ** 2)
+        return [total, adf.sin(x[0]) * 3, 2 ** x[1]]
+
+    def test_program(self):
+        program = Program(self.foo, self.xs[0])
+        assert program.n_inputs == 3
+        assert len(program) > 0
+
+        # replaying on plain dual numbers gives the same output as the function itself
+        from autodiff30.dual import DualNumber
+
+        ds = [DualNumber(elt, 0) for elt in self.xs[1]]
+        assert [y.real for y in program(ds)] == [y.real for y in self.foo(ds)]
+
+        # negative literals, constants bound by name and constant outputs in the generated code
+        def bar(x):
+            return [x[0] ** -1.5 * np.float32(2) - 3.0 / x[1] + adf.log(x[0], base=np.e), -np.inf]
+
+        program = Program(bar, [1.5, 2.0])
+        ds = [DualNumber(1.2, 1.0), DualNumber(0.7, 0.0)]
+        res, expected = program(ds), bar(ds)
+        assert (res[0].real, res[0].dual, res[1]) == (expected[0].real, expected[0].dual, -np.inf)
+
+    def test_compiled_matches(self):
+        calls = []
+
+        def foo(x):
+            calls.append(1)
+            return self.foo(x)
+
+        plain = adfunction(self.foo)
+        compiled = adfunction(compile=True)(foo)
+        compiled_reverse = adfunction(foo, mode="reverse", compile=True)
+        for x in self.xs:
+            assert np.allclose(compiled(x), plain(x))
+            assert np.allclose(compiled.grad(x), plain.grad(x))
+            assert np.allclose(compiled_reverse.grad(x), plain.grad(x))
+        X = np.array(self.xs)
+        assert np.allclose(compiled.grad_batch(X), plain.grad_batch(X))
+        # each adstruc traces once for list inputs of length 3, then only replays
+        assert len(calls) == 2
+
+    def test_retrace(self):
+        calls = []
+
+        @adfunction(compile=True)
+        def foo(x):
+            calls.append(1)
+            return sum(xi**2 for xi in x)
+
+        assert foo.grad([1.0, 2.0]) == [2.0, 4.0]
+        assert foo.grad([3.0, 4.0]) == [6.0, 8.0]
+        assert len(calls) == 1
+        assert foo.grad([1.0, 2.0, 3.0]) == [2.0, 4.0, 6.0]
+        assert len(calls) == 2
+        assert set(foo.programs) == {2, 3}
+
+        @adfunction(compile=True)
+        def foo(x):
+            return x * x
+
+        assert foo.grad(3.0) == 6.0
+        assert foo.grad(5.0) == 10.0
+
+    def test_optimize(self):
+        @adfunction(compile=True)
+        def foo(x):
+            return (x[0] - 1) ** 2 + (x[1] + 2) ** 2
+
+        assert np.linalg.norm(ad_opt.GD(foo, [0.0, 0.0]) - np.array([1, -2])) < 1e-5
+
+    def test_frozen_branch(self):
+        @adfunction(compile=True)
+        def foo(x):
+            return x * x if x > 0 else -x
+
+        assert foo.grad(2.0) == 4.0
+        # the branch taken at the tracing point is replayed
+        assert foo.grad(-2.0) == -4.0
+
+    def test_graph_optimization(self):
+        def foo(x):
+            a = adf.sin(x[0]) ** 1 * 1 + adf.sin(x[0]) * x[1] ** 0 - 0
+            b = x[0] * x[1] + x[1] * x[0] + adf.exp(x[1] ** 0 * 2) * x[2] / 1
+            return [a * b + adf.log(x[2], base=10) - adf.log(x[2], base=2), x[2] ** 0 * 3]
+
+        plain = adfunction(foo)
+        compiled = adfunction(foo, compile=True)
+        report = compiled.optimize(self.xs[0])
+        assert report.before == 24 and report.after == len(compiled.programs[3]) == 12
+        assert (report.eliminated, report.folded, report.simplified) == (2, 3, 8)
+        for x in self.xs:
+            assert compiled(x) == plain(x)
+            assert np.allclose(compiled.grad(x), plain.grad(x))
+            assert np.allclose(compiled.hessian(x), plain.hessian(x))
+
+        program = Program(foo, self.xs[0])
+        program.optimize()
+        reverse = adfunction(foo, mode="reverse", compile=True)
+        reverse.programs[3] = program
+        assert np.allclose(reverse.grad(self.xs[1]), plain.grad(self.xs[1]))
+        # a second pass finds nothing left to optimize
+        assert program.optimize().after == 12
+
+        with pytest.raises(ValueError):
+            plain.optimize(self.xs[0])
@@ -2,17 +2,26 @@
 import pytest
 import math
 
+import autodiff30
 from autodiff30.ad import adstruc, adfunction
+from autodiff30.dual import DualNumber
 import autodiff30.functions as adf
 
 # from numpy import log, exp, sin, cos, tan, arcsin, arccos, arctan, sqrt
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 
 def logistic(x):
     return 1 / (1 + np.exp(-x))
 
 
+# defined at the top level so that it can be sent to worker processes
+@adfunction
+def chain(x):
+    return [x[i] * adf.sin(x[i + 1]) for i in range(len(x) - 1)]
+
+
 class TestUserLevel:
 
     x = 3
@@ -243,3 +252,296 @@ class TestUserLevel:
             foo.grad(self.x),
             1.17292966,
         )
+
+    def test_vector_mode(self):
+        """The full Jacobian is obtained from a single evaluation of the function"""
+
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return [adf.sin(x[0]) * x[1], adf.exp(x[1]) + x[2] ** 2, x[0] / x[2]]
+
+        x = [0.5, -1.0, 2.0]
+        J = foo.grad(x)
+        assert len(calls) == 1
+        expected = [
+            [np.cos(0.5) * -1.0, np.sin(0.5), 0],
+            [0, np.exp(-1.0), 4.0],
+            [1 / 2.0, 0, -0.5 / 4.0],
+        ]
+        assert np.allclose(J, expected)
+
+        # Outputs that do not depend on the input still get a full gradient row
+        @adfunction
+        def foo(x):
+            return [x[0] ** 0, x[0] * x[1]]
+
+        assert foo.grad([2, 3]) == [[0, 0], [3, 2]]
+
+    def test_batch(self):
+        """Jacobians at many points from one vectorized evaluation"""
+
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return [adf.sin(x[0]) * adf.exp(x[1]), adf.log(x[0]) / x[1], x[1] ** 0]
+
+        rng = np.random.default_rng(0)
+        X = rng.uniform(0.5, 2.0, size=(100, 2))
+        J = foo.grad_batch(X)
+        assert J.shape == (100, 3, 2)
+        assert len(calls) == 1
+        for x, jac in zip(X[:5], J[:5]):
+            assert np.allclose(jac, foo.grad(x))
+
+        @adfunction
+        def foo(x):
+            return adf.tanh(x) * x
+
+        X = np.linspace(-1, 1, 11)
+        J = foo.grad_batch(X)
+        assert J.shape == (11, 1, 1)
+        assert np.allclose(J[:, 0, 0], [foo.grad(x) for x in X])
+
+        @adfunction
+        def foo(x):
+            return adf.sqrt(x[0])
+
+        with pytest.raises(ValueError):
+            foo.grad_batch(np.array([[1.0], [-1.0]]))
+
+    def test_directional(self):
+        """Jacobian-vector and vector-Jacobian products"""
+
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return [x[0] * x[1] * x[2], adf.sin(x[0]) + x[2] ** 2]
+
+        x = [1.0, 2.0, 3.0]
+        v = [0.5, -1.0, 2.0]
+        u = [2.0, -3.0]
+        J = np.array(foo.grad(x))
+        calls.clear()
+        assert np.allclose(foo.jvp(x, v), J @ v)
+        assert np.allclose(foo.vjp(x, u), np.array(u) @ J)
+        assert len(calls) == 2
+
+        @adfunction
+        def foo(x):
+            return adf.exp(x[0]) * x[1]
+
+        assert math.isclose(foo.jvp([0.0, 2.0], [1.0, 1.0]), 3.0)
+        assert np.allclose(foo.vjp([0.0, 2.0], 2.0), [4.0, 2.0])
+
+        @adfunction
+        def foo(x):
+            return [x**2, 3 * x]
+
+        assert foo.jvp(2.0, 0.5) == [2.0, 1.5]
+        assert foo.vjp(2.0, [1.0, 1.0]) == 7.0
+
+    def test_cache(self):
+        """Opt-in LRU cache of values and Jacobians"""
+
+        calls = []
+
+        @adfunction(cache_size=2)
+        def foo(x):
+            calls.append(1)
+            return [x[0] * x[1], x[0] + x[1]]
+
+        assert foo.grad([2, 3]) == [[3, 2], [1, 1]]
+        # the gradient pass also cached the value
+        assert foo([2, 3]) == [6, 5]
+        assert foo.grad([2, 3]) == [[3, 2], [1, 1]]
+        assert len(calls) == 1
+        assert foo.cache_info() == (2, 1, 2, 1)
+
+        # results handed out are copies of the cached ones
+        foo.grad([2, 3])[0][0] = 100
+        assert foo.grad([2, 3]) == [[3, 2], [1, 1]]
+
+        # a value alone does not answer a gradient request
+        foo([1, 1])
+        foo.grad([1, 1])
+        assert len(calls) == 3
+
+        # the least recently used point is evicted
+        foo(np.array([5.0, 5.0]))
+        assert foo.cache_info().currsize == 2
+        foo([2, 3])
+        assert len(calls) == 5
+        foo([5, 5])
+        assert len(calls) == 5
+
+        foo.cache_clear()
+        assert foo.cache_info() == (0, 0, 2, 0)
+
+        @adfunction(mode="reverse", cache_size=4)
+        def foo(x):
+            calls.append(1)
+            return adf.exp(x)
+
+        calls.clear()
+        assert foo.grad(0.0) == 1.0
+        assert foo(0.0) == 1.0
+        assert len(calls) == 1
+
+        # without a cache every call evaluates f
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return x
+
+        calls.clear()
+        foo(1)
+        foo(1)
+        assert len(calls) == 2
+        assert foo.cache_info() == (0, 0, 0, 0)
+
+    def test_value_and_grad(self):
+        """Value and gradient from the same pass"""
+
+        calls = []
+
+        @adfunction
+        def foo(x):
+            calls.append(1)
+            return [x[0] * x[1], adf.sin(x[0])]
+
+        value, J = foo.value_and_grad([2.0, 3.0])
+        assert value == [6.0, np.sin(2.0)]
+        assert J == foo.grad([2.0, 3.0])
+        assert len(calls) == 2
+
+        foo = adfunction(foo.f, mode="reverse", cache_size=1)
+        value, J = foo.value_and_grad([2.0, 3.0])
+        assert value == [6.0, np.sin(2.0)]
+        assert np.allclose(J, [[3.0, 2.0], [np.cos(2.0), 0.0]])
+        assert foo.value_and_grad([2.0, 3.0]) == (value, J)
+        assert foo.cache_info().hits == 1
+
+    def test_array_results(self):
+        """Array inputs give float64 array results"""
+
+        @adfunction
+        def foo(x):
+            return [x[0] * x[1], x[0] + x[1] ** 2]
+
+        x = np.array([2.0, 3.0])
+        value, J = foo.value_and_grad(x)
+        assert isinstance(value, np.ndarray) and isinstance(J, np.ndarray)
+        assert value.tolist() == [6.0, 11.0]
+        assert J.tolist() == [[3.0, 2.0], [1.0, 6.0]]
+        assert foo(x).tolist() == [6.0, 11.0]
+        assert foo.jvp(x, np.array([1.0, 0.0])).tolist() == [3.0, 1.0]
+        assert foo.vjp(x, [1.0, 1.0]).tolist() == [4.0, 8.0]
+        assert foo.hessian(x).shape == (2, 2, 2)
+
+        @adfunction(mode="reverse")
+        def foo(x):
+            return x[0] * x[1]
+
+        value, J = foo.value_and_grad(x)
+        assert value == 6.0
+        assert isinstance(J, np.ndarray) and J.tolist() == [3.0, 2.0]
+        assert foo.hvp(x, np.array([1.0, 1.0])).tolist() == [1.0, 1.0]
+
+    def test_parallel_grad(self):
+        """Chunks of directions evaluated in a pool give the serial Jacobian"""
+
+        class CountingExecutor(ThreadPoolExecutor):
+            """Counts the batches of chunks dispatched to the pool"""
+
+            maps = 0
+
+            def map(self, *args, **kwargs):
+                self.maps += 1
+                return super().map(*args, **kwargs)
+
+        # a fresh adstruc of the top-level function, so that the costs set below do not leak to other tests
+        f = adfunction(chain.f)
+        x = np.linspace(0.1, 1, 7)
+        expected = f.grad(x)
+        # the first call measures the cost of a serial evaluation, and returns its result
+        with CountingExecutor(3) as executor:
+            assert np.array_equal(f.grad(x, workers=3, executor=executor), expected)
+        assert executor.maps == 0 and 7 in f.costs
+
+        # an expensive function is evaluated in the pool
+        f.costs[7] = f.parallel_min_cost
+        with CountingExecutor(3) as executor:
+            J = f.grad(x, workers=3, executor=executor)
+        assert executor.maps == 1
+        assert isinstance(J, np.ndarray) and np.array_equal(J, expected)
+        assert f.grad(x.tolist(), workers=3) == expected.tolist()
+
+        # a cheap one stays serial
+        f.costs[7] = 0.0
+        with CountingExecutor(3) as executor:
+            assert np.array_equal(f.grad(x, workers=3, executor=executor), expected)
+        assert executor.maps == 0
+
+    def test_numpy_function(self):
+        """Functions written with NumPy are differentiated unchanged"""
+
+        @adfunction
+        def foo(x):
+            return np.sum(np.exp(np.array(x)) * np.arange(1, 4)) + np.sin(x[0])
+
+        assert np.allclose(foo.grad([0.0, 0.0, 0.0]), [2.0, 2.0, 3.0])
+
+    def test_precision(self):
+        @adfunction
+        def foo(x):
+            return [adf.tanh(x[0] * x[1]) + adf.log(x[1], base=2), adf.exp(-x[0]) * x[1] ** 1.5]
+
+        X = np.random.default_rng(0).uniform(0.1, 2, size=(50, 2))
+        J = foo.grad_batch(X)
+        for precision in ("single", "mixed"):
+            J32 = foo.grad_batch(X, precision=precision)
+            assert J32.dtype == np.float32
+            assert np.allclose(J32, J, rtol=1e-5, atol=1e-6)
+
+        with autodiff30.precision("mixed"):
+            x = DualNumber(np.linspace(0.1, 1, 5), np.ones(5))
+            y = adf.sin(x) * x + 2
+            assert y.real.dtype == np.float64 and y.dual.dtype == np.float32
+            # the policy is local to the thread that set it
+            with ThreadPoolExecutor(1) as executor:
+                dtype = executor.submit(lambda: DualNumber(np.ones(2), np.ones(2)).dual.dtype).result()
+            assert dtype == np.float64
+        assert DualNumber(np.ones(2), np.ones(2)).dual.dtype == np.float64
+        with pytest.raises(ValueError):
+            with autodiff30.precision("half"):
+                pass
+
+    def test_grad_chunked(self, tmp_path):
+        @adfunction
+        def foo(x):
+            return [adf.sin(x[0]) * x[1], adf.exp(x[1] - x[2]) + x[0] ** 2]
+
+        X = np.random.default_rng(0).uniform(-1, 1, size=(50, 3))
+        np.save(tmp_path / "X.npy", X)
+        inputs = np.load(tmp_path / "X.npy", mmap_mode="r")
+        out = np.lib.format.open_memmap(tmp_path / "J.npy", mode="w+", shape=(50, 2, 3))
+
+        # the chunks do not divide the rows evenly
+        assert foo.grad_chunked(inputs, out, chunk_size=16) is out
+        assert np.allclose(np.load(tmp_path / "J.npy"), foo.grad_batch(X))
+
+        J = foo.grad_chunked(memoryview(X), chunk_size=7)
+        assert J.shape == (50, 2, 3) and np.allclose(J, foo.grad_batch(X))
+        J = adfunction(adf.tanh).grad_chunked(X[:, 0], chunk_size=20, precision="single")
+        assert J.dtype == np.float32 and np.allclose(J[:, 0, 0], 1 - np.tanh(X[:, 0]) ** 2, rtol=1e-6)
+
+        # no rows
+        assert foo.grad_chunked(X[:0]).shape == (0, 2, 3)
+        assert adfunction(adf.tanh).grad_chunked(X[:0, 0]).shape == (0, 1, 1)